@@ -48,10 +48,28 @@ class DatabaseCache(object):
         else:
             uri = "file:%s?mode=rwc" % self.file_name
 
-        # Open connections
-        self.memory_connection = sqlite3.connect(":memory:")
+        # Open connections.  The memory copy is left in autocommit mode, so
+        # that the explicit transactions of its users are the only ones.
+        self.memory_connection = sqlite3.connect(
+            ":memory:", isolation_level=None)
         self.file_connection = sqlite3.connect(uri, uri=True)
 
+        # Large index builds should sort in memory, like the rest of the
+        # database.
+        self.memory_connection.execute("PRAGMA temp_store = MEMORY;")
+
+        if not self.read_only:
+            # The file is only ever written by the final dump of the memory
+            # copy, which replaces it completely, so journaling and syncing
+            # each backup step buys nothing.
+            self.file_connection.execute("PRAGMA journal_mode = OFF;")
+            self.file_connection.execute("PRAGMA synchronous = OFF;")
+
+            # Nothing else opens the file while it is being written, so keep
+            # its lock across the backup steps rather than retaking it for
+            # each one.
+            self.file_connection.execute("PRAGMA locking_mode = EXCLUSIVE;")
+
         # Load the database
         print("Loading database from '{}'".format(self.file_name))
         self.file_connection.backup(
@@ -92,6 +92,17 @@ SELECT name FROM tile_type WHERE pkey = (
     return c.fetchone()[0]
 
 
+def get_tile_types(conn):
+    """ Return a map of physical tile name to tile type name. """
+    c = conn.cursor()
+
+    c.execute("""
+SELECT phy_tile.name, tile_type.name FROM phy_tile
+INNER JOIN tile_type ON phy_tile.tile_type_pkey = tile_type.pkey;""")
+
+    return dict(c.fetchall())
+
+
 def get_wire_pkey(conn, tile_name, wire):
     c = conn.cursor()
     c.execute(
@@ -20,6 +20,7 @@
 import os
 import datetime
 import argparse
+from array import array
 
 from prjxray.db import Database
 
@@ -54,17 +55,20 @@ def import_site_type(db, write_cur, site_types, site_type_name):
 
     write_cur.execute("INSERT INTO site_type(name) VALUES (?)",
                       (site_type_name, ))
-    site_types[site_type_name] = write_cur.lastrowid
+    site_type_pkey = write_cur.lastrowid
+    site_types[site_type_name] = site_type_pkey
 
+    site_pins = []
     for site_pin in site_type.get_site_pins():
         pin_info = site_type.get_site_pin(site_pin)
+        site_pins.append((pin_info.name, site_type_pkey,
+                          pin_info.direction.value))
 
-        write_cur.execute(
-            """
+    write_cur.executemany(
+        """
 INSERT INTO site_pin(name, site_type_pkey, direction)
 VALUES
-  (?, ?, ?)""", (pin_info.name, site_types[site_type_name],
-                 pin_info.direction.value))
+  (?, ?, ?)""", site_pins)
 
 
 def build_pss_object_mask(db, tile_type_name):
@@ -106,7 +110,8 @@ def build_pss_object_mask(db, tile_type_name):
     return masked_sites, masked_wires, masked_pips
 
 
-def import_tile_type(db, write_cur, tile_types, site_types, tile_type_name):
+def import_tile_type(db, write_cur, tile_types, site_types, tile_wires,
+                     tile_type_name):
     assert tile_type_name not in tile_types
     tile_type = db.get_tile_type(tile_type_name)
 
@@ -121,23 +126,30 @@ def import_tile_type(db, write_cur, tile_types, site_types, tile_type_name):
 
     write_cur.execute("INSERT INTO tile_type(name) VALUES (?)",
                       (tile_type_name, ))
-    tile_types[tile_type_name] = write_cur.lastrowid
+    tile_type_pkey = write_cur.lastrowid
+    tile_types[tile_type_name] = tile_type_pkey
+
+    # Wire pkeys are assigned here and kept in tile_wires, so that later
+    # updates can address wires by primary key before any index exists.
+    write_cur.execute("""SELECT COALESCE(MAX(pkey), 0) FROM wire_in_tile;""")
+    wire_in_tile_pkey = write_cur.fetchone()[0]
 
     wires = {}
-    for wire, wire_rc_element in tile_type.get_wires().items():
+    for wire in tile_type.get_wires():
         if wire in masked_wires:
             continue
 
-        write_cur.execute(
-            """
-INSERT INTO wire_in_tile(name, phy_tile_type_pkey, tile_type_pkey)
+        wire_in_tile_pkey += 1
+        wires[wire] = wire_in_tile_pkey
+
+    tile_wires[tile_type_name] = wires
+
+    write_cur.executemany(
+        """
+INSERT INTO wire_in_tile(pkey, name, phy_tile_type_pkey, tile_type_pkey)
 VALUES
-  (?, ?, ?)""", (
-                wire,
-                tile_types[tile_type_name],
-                tile_types[tile_type_name],
-            ))
-        wires[wire] = write_cur.lastrowid
+  (?, ?, ?, ?)""", ((wire_in_tile_pkey, wire, tile_type_pkey, tile_type_pkey)
+                    for wire, wire_in_tile_pkey in wires.items()))
 
     for site in tile_type.get_sites():
         if (site.prefix, site.name) in masked_sites:
@@ -147,57 +159,76 @@ VALUES
             import_site_type(db, write_cur, site_types, site.type)
 
 
-def add_wire_to_site_relation(db, write_cur, tile_types, site_types,
-                              tile_type_name):
+def get_site_pin_pkeys(write_cur):
+    """ Returns map of (site_type_pkey, site pin name) to site_pin pkey. """
+    write_cur.execute("""SELECT site_type_pkey, name, pkey FROM site_pin;""")
+    return {(site_type_pkey, name): pkey
+            for site_type_pkey, name, pkey in write_cur}
+
+
+def add_wire_to_site_relation(db, write_cur, tile_types, site_types, site_pins,
+                              tile_wires, tile_type_name):
     tile_type = db.get_tile_type(tile_type_name)
+    tile_type_pkey = tile_types[tile_type_name]
+    wires = tile_wires[tile_type_name]
+
+    # Site pkeys are assigned here, so that sites can be inserted in one
+    # batch and their site pin wires updated in another.
+    write_cur.execute("""SELECT COALESCE(MAX(pkey), 0) FROM site;""")
+    site_pkey = write_cur.fetchone()[0]
+
+    sites = []
+    site_wires = []
     for site in tile_type.get_sites():
 
         if site.type not in site_types:
             continue
 
-        write_cur.execute(
-            """
-INSERT INTO site(name, x_coord, y_coord, site_type_pkey, tile_type_pkey)
-VALUES
-  (?, ?, ?, ?, ?)""", (site.name, site.x, site.y, site_types[site.type],
-                       tile_types[tile_type_name]))
-
-        site_pkey = write_cur.lastrowid
+        site_type_pkey = site_types[site.type]
+        site_pkey += 1
+        sites.append((site_pkey, site.name, site.x, site.y, site_type_pkey,
+                      tile_type_pkey))
 
         for site_pin in site.site_pins:
-            write_cur.execute(
-                """
-SELECT
-  pkey
-FROM
-  site_pin
-WHERE
-  name = ?
-  AND site_type_pkey = ?""", (site_pin.name, site_types[site.type]))
-            result = write_cur.fetchone()
-            site_pin_pkey = result[0]
+            site_pin_pkey = site_pins[site_type_pkey, site_pin.name]
 
-            write_cur.execute(
-                """
+            # Masked wires are not in wire_in_tile.
+            wire_in_tile_pkey = wires.get(site_pin.wire)
+            if wire_in_tile_pkey is not None:
+                site_wires.append((site_pkey, site_pin_pkey,
+                                   wire_in_tile_pkey))
+
+    write_cur.executemany(
+        """
+INSERT INTO site(pkey, name, x_coord, y_coord, site_type_pkey, tile_type_pkey)
+VALUES
+  (?, ?, ?, ?, ?, ?)""", sites)
+
+    write_cur.executemany(
+        """
 UPDATE
   wire_in_tile
 SET
   site_pkey = ?,
   site_pin_pkey = ?
 WHERE
-  name = ?
-  and tile_type_pkey = ?;""", (site_pkey, site_pin_pkey, site_pin.wire,
-                               tile_types[tile_type_name]))
+  pkey = ?;""", site_wires)
 
 
 def build_tile_type_indicies(write_cur):
     write_cur.execute(
         "CREATE INDEX site_pin_index ON site_pin(name, site_type_pkey);")
+    # wire_in_tile is looked up by name within a phy tile type, and by site
+    # pin within a site.
     write_cur.execute(
-        "CREATE INDEX wire_name_index ON wire_in_tile(name, tile_type_pkey);")
+        "CREATE INDEX wire_name_index ON wire_in_tile(name, phy_tile_type_pkey);"
+    )
     write_cur.execute(
         "CREATE INDEX wire_tile_site_index ON wire_in_tile(tile_type_pkey, site_pkey);"
     )
+    write_cur.execute(
+        "CREATE INDEX wire_site_index ON wire_in_tile(site_pkey, site_pin_pkey);"
+    )
     write_cur.execute(
         "CREATE INDEX wire_site_pin_index ON wire_in_tile(site_pin_pkey);")
     write_cur.execute(
@@ -214,77 +245,96 @@ def build_other_indicies(write_cur):
 
 def import_phy_grid(db, grid, conn):
     write_cur = conn.cursor()
+    write_cur.execute("""BEGIN EXCLUSIVE TRANSACTION;""")
 
     tile_types = {}
     site_types = {}
+    tile_wires = {}
 
-    for tile in grid.tiles():
-        gridinfo = grid.gridinfo_at_tilename(tile)
+    # Look up each tile in the grid once, as both passes below need it.
+    grid_tiles = [(tile, grid.gridinfo_at_tilename(tile),
+                   grid.loc_of_tilename(tile)) for tile in grid.tiles()]
 
+    for tile, gridinfo, loc in grid_tiles:
         if gridinfo.tile_type not in tile_types:
-            if gridinfo.tile_type in tile_types:
-                continue
-
-            import_tile_type(db, write_cur, tile_types, site_types,
+            import_tile_type(db, write_cur, tile_types, site_types, tile_wires,
                              gridinfo.tile_type)
 
-    write_cur.connection.commit()
-
-    build_tile_type_indicies(write_cur)
-    write_cur.connection.commit()
-
+    site_pins = get_site_pin_pkeys(write_cur)
     for tile_type in tile_types:
         add_wire_to_site_relation(db, write_cur, tile_types, site_types,
-                                  tile_type)
+                                  site_pins, tile_wires, tile_type)
 
-    for tile in grid.tiles():
-        gridinfo = grid.gridinfo_at_tilename(tile)
+    del tile_wires
 
-        loc = grid.loc_of_tilename(tile)
+    # Resolve the site of each site instance from one query, rather than
+    # scanning the site table once per site instance.
+    site_pkeys = {}
+    write_cur.execute("""
+SELECT
+  pkey,
+  name,
+  x_coord,
+  y_coord,
+  site_type_pkey,
+  tile_type_pkey
+FROM
+  site
+ORDER BY
+  pkey;""")
+    for site_pkey, name, x, y, site_type_pkey, tile_type_pkey in write_cur:
+        site_pkeys.setdefault((name, x, y, site_type_pkey, tile_type_pkey),
+                              []).append(site_pkey)
+
+    # Phy tile pkeys are assigned here, so that phy tiles and their site
+    # instances can be inserted in batches.
+    write_cur.execute("""SELECT COALESCE(MAX(pkey), 0) FROM phy_tile;""")
+    phy_tile_pkey = write_cur.fetchone()[0]
+
+    phy_tiles = []
+    site_instances = []
+    for tile, gridinfo, loc in grid_tiles:
+        tile_type_pkey = tile_types[gridinfo.tile_type]
+        phy_tile_pkey += 1
         # tile: pkey name tile_type_pkey grid_x grid_y
-        write_cur.execute(
-            """
-INSERT INTO phy_tile(name, tile_type_pkey, grid_x, grid_y)
-VALUES
-  (?, ?, ?, ?)""", (
-                tile,
-                tile_types[gridinfo.tile_type],
-                loc.grid_x,
-                loc.grid_y,
-            ))
-        phy_tile_pkey = write_cur.lastrowid
+        phy_tiles.append((
+            phy_tile_pkey,
+            tile,
+            tile_type_pkey,
+            loc.grid_x,
+            loc.grid_y,
+        ))
 
         tile_type = db.get_tile_type(gridinfo.tile_type)
         for site, instance_site in zip(tile_type.sites,
                                        tile_type.get_instance_sites(gridinfo)):
-            write_cur.execute(
-                """
-INSERT INTO site_instance(name, x_coord, y_coord, site_pkey, phy_tile_pkey, prohibited)
-SELECT ?, ?, ?, site.pkey, ?, ?
-FROM site
-WHERE
-    site.name = ?
-AND
-    site.x_coord = ?
-AND
-    site.y_coord = ?
-AND
-    site.site_type_pkey = (SELECT pkey FROM site_type WHERE name = ?)
-AND
-    tile_type_pkey = ?;
-                """, (
+            key = (site.name, site.x, site.y, site_types.get(site.type),
+                   tile_type_pkey)
+            for site_pkey in site_pkeys.get(key, ()):
+                site_instances.append((
                     instance_site.name,
                     instance_site.x,
                     instance_site.y,
+                    site_pkey,
                     phy_tile_pkey,
                     instance_site.name in gridinfo.prohibited_sites,
-                    site.name,
-                    site.x,
-                    site.y,
-                    site.type,
-                    tile_types[gridinfo.tile_type],
                 ))
 
+    write_cur.executemany(
+        """
+INSERT INTO phy_tile(pkey, name, tile_type_pkey, grid_x, grid_y)
+VALUES
+  (?, ?, ?, ?, ?)""", phy_tiles)
+
+    write_cur.executemany(
+        """
+INSERT INTO site_instance(name, x_coord, y_coord, site_pkey, phy_tile_pkey, prohibited)
+VALUES
+  (?, ?, ?, ?, ?, ?)""", site_instances)
+
+    # Indices are only built once the tables are fully populated, as
+    # maintaining them during the bulk inserts above is slower.
+    build_tile_type_indicies(write_cur)
     build_other_indicies(write_cur)
     write_cur.connection.commit()
 
@@ -296,41 +346,66 @@ def import_nodes(db, grid, conn):
     write_cur = conn.cursor()
     write_cur.execute("""BEGIN EXCLUSIVE TRANSACTION;""")
 
+    # Build the wire list of each tile type once, with one query, rather than
+    # walking the prjxray tile type and looking up each wire for every tile.
+    # wire_in_tile rows were inserted in tile type wire order, so pkey order
+    # preserves it.
+    tile_type_wires = {}
+    cur.execute(
+        """SELECT tile_type_pkey, name, pkey FROM wire_in_tile ORDER BY pkey;"""
+    )
+    for tile_type_pkey, wire, wire_in_tile_pkey in cur:
+        tile_type_wires.setdefault(tile_type_pkey, []).append(
+            (wire, wire_in_tile_pkey))
+
+    # Resolve phy tiles with one query, rather than one query per tile.
+    phy_tiles = {}
+    cur.execute("""SELECT name, pkey, tile_type_pkey FROM phy_tile;""")
+    for tile, phy_tile_pkey, tile_type_pkey in cur:
+        phy_tiles[tile] = phy_tile_pkey, tile_type_pkey
+
+    # Wire pkeys are assigned here, so that wires can be inserted in batches
+    # without reading back each pkey.
+    cur.execute("""SELECT COALESCE(MAX(pkey), 0) FROM wire;""")
+    wire_pkey = cur.fetchone()[0]
+    first_wire_pkey = wire_pkey + 1
+
     tile_wire_map = {}
-    wires = {}
     for tile in progressbar_utils.progressbar(grid.tiles()):
-        gridinfo = grid.gridinfo_at_tilename(tile)
-        tile_type = db.get_tile_type(gridinfo.tile_type)
+        phy_tile_pkey, tile_type_pkey = phy_tiles[tile]
 
-        cur.execute(
-            """SELECT pkey, tile_type_pkey FROM phy_tile WHERE name = ?;""",
-            (tile, ))
-        phy_tile_pkey, tile_type_pkey = cur.fetchone()
+        rows = []
+        for wire, wire_in_tile_pkey in tile_type_wires.get(tile_type_pkey, ()):
+            wire_pkey += 1
 
-        for wire in tile_type.get_wires():
             # pkey node_pkey tile_pkey wire_in_tile_pkey
-            cur.execute(
-                """
-SELECT pkey FROM wire_in_tile WHERE name = ? and tile_type_pkey = ?;""",
-                (wire, tile_type_pkey))
-
-            wire_in_tile_pkey = cur.fetchone()
-            if wire_in_tile_pkey is None:
-                continue
-            wire_in_tile_pkey = wire_in_tile_pkey[0]
-
-            write_cur.execute(
-                """
-INSERT INTO wire(phy_tile_pkey, wire_in_tile_pkey)
-VALUES
-  (?, ?);""", (phy_tile_pkey, wire_in_tile_pkey))
+            rows.append((wire_pkey, phy_tile_pkey, wire_in_tile_pkey))
 
             assert (tile, wire) not in tile_wire_map
-            wire_pkey = write_cur.lastrowid
             tile_wire_map[(tile, wire)] = wire_pkey
-            wires[wire_pkey] = None
 
-    write_cur.execute("""COMMIT TRANSACTION;""")
+        write_cur.executemany(
+            """
+INSERT INTO wire(pkey, phy_tile_pkey, wire_in_tile_pkey)
+VALUES
+  (?, ?, ?);""", rows)
+
+    # Wires are merged into nodes with a disjoint-set forest, using union by
+    # rank and path compression.  parent and rank are indexed by wire pkey,
+    # and are stored as packed arrays, as there is an entry for every wire in
+    # the part.
+    parent = array('q', range(wire_pkey + 1))
+    rank = array('B', bytes(wire_pkey + 1))
+
+    def find(wire):
+        root = wire
+        while parent[root] != root:
+            root = parent[root]
+
+        while parent[wire] != root:
+            parent[wire], wire = root, parent[wire]
+
+        return root
 
     connections = db.connections()
 
@@ -341,49 +416,50 @@ VALUES
         b_pkey = tile_wire_map[(connection.wire_b.tile,
                                 connection.wire_b.wire)]
 
-        a_node = wires[a_pkey]
-        b_node = wires[b_pkey]
-
-        if a_node is None:
-            a_node = set((a_pkey, ))
+        a_root = find(a_pkey)
+        b_root = find(b_pkey)
 
-        if b_node is None:
-            b_node = set((b_pkey, ))
+        if a_root != b_root:
+            if rank[a_root] < rank[b_root]:
+                a_root, b_root = b_root, a_root
 
-        if a_node is not b_node:
-            a_node |= b_node
+            parent[b_root] = a_root
+            if rank[a_root] == rank[b_root]:
+                rank[a_root] += 1
 
-            for wire in a_node:
-                wires[wire] = a_node
+    del tile_wire_map
+    del rank
 
+    # Group every wire by the root of its set, in one pass.  Each wire lands
+    # in exactly one node, and nodes are in order of their lowest wire pkey.
     nodes = {}
-    for wire_pkey, node in wires.items():
-        if node is None:
-            node = set((wire_pkey, ))
-
-        assert wire_pkey in node
-
-        nodes[id(node)] = node
-
-    wires_assigned = set()
-    for node in progressbar_utils.progressbar(nodes.values()):
-        write_cur.execute("""INSERT INTO node(number_pips) VALUES (0);""")
-        node_pkey = write_cur.lastrowid
-
-        for wire_pkey in node:
-            wires_assigned.add(wire_pkey)
-            write_cur.execute(
-                """
+    for wire_pkey in range(first_wire_pkey, wire_pkey + 1):
+        nodes.setdefault(find(wire_pkey), []).append(wire_pkey)
+
+    # Node pkeys are assigned here, so that nodes and their wires can be
+    # written in batches.
+    cur.execute("""SELECT COALESCE(MAX(pkey), 0) FROM node;""")
+    first_node_pkey = cur.fetchone()[0] + 1
+
+    node_pkeys = range(first_node_pkey, first_node_pkey + len(nodes))
+    write_cur.executemany(
+        """INSERT INTO node(pkey, number_pips) VALUES (?, 0);""",
+        ((node_pkey, ) for node_pkey in node_pkeys))
+
+    def wire_nodes(nodes):
+        for node_pkey, node in zip(node_pkeys,
+                                   progressbar_utils.progressbar(nodes)):
+            for wire_pkey in node:
+                yield node_pkey, wire_pkey
+
+    write_cur.executemany(
+        """
             UPDATE wire
                 SET node_pkey = ?
                 WHERE pkey = ?
-            ;""", (node_pkey, wire_pkey))
+            ;""", wire_nodes(nodes.values()))
 
-    assert len(set(wires.keys()) ^ wires_assigned) == 0
-
-    del tile_wire_map
     del nodes
-    del wires
 
     write_cur.execute(
         "CREATE INDEX wire_in_tile_index ON wire(wire_in_tile_pkey);")
@@ -421,29 +497,25 @@ FROM
     assert cur.fetchone()[0] == 1
 
     print("{}: Assigning site wires for nodes".format(datetime.datetime.now()))
+
+    # Each node has at most one site wire (checked above), so stream the site
+    # wires straight into primary key updates rather than running a
+    # correlated subquery for every node.
     cur.execute("""
-WITH site_wires(wire_pkey, node_pkey) AS (
-  SELECT
-    wire.pkey,
-    wire.node_pkey
-  FROM
-    wire_in_tile
-    INNER JOIN wire ON wire.wire_in_tile_pkey = wire_in_tile.pkey
-  WHERE
-    wire_in_tile.site_pin_pkey IS NOT NULL
-)
-UPDATE
-  node
-SET
-  site_wire_pkey = (
-    SELECT
-      site_wires.wire_pkey
-    FROM
-      site_wires
-    WHERE
-      site_wires.node_pkey = node.pkey
-  );
-      """)
+SELECT
+  wire.pkey,
+  wire.node_pkey
+FROM
+  wire_in_tile
+  INNER JOIN wire ON wire.wire_in_tile_pkey = wire_in_tile.pkey
+WHERE
+  wire_in_tile.site_pin_pkey IS NOT NULL;
+""")
+
+    write_cur = conn.cursor()
+    write_cur.execute("""BEGIN EXCLUSIVE TRANSACTION;""")
+    write_cur.executemany(
+        """UPDATE node SET site_wire_pkey = ? WHERE pkey = ?;""", cur)
 
     cur.connection.commit()
 
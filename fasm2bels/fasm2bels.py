@@ -18,7 +18,9 @@
 # SPDX-License-Identifier: Apache-2.0
 
 import argparse
+from collections import defaultdict
 import csv
+import itertools
 import os.path
 import sqlite3
 import subprocess
@@ -50,7 +52,7 @@ from .models.gtp_channel_models import process_gtp_channel
 from .models.pcie_models import process_pcie
 
 from .database.create_channels import create_channels
-from .database.connection_db_utils import get_tile_type
+from .database.connection_db_utils import get_tile_type, get_tile_types
 
 from .lib.parse_pcf import parse_simple_pcf
 from .lib.parse_xdc import parse_simple_xdc
@@ -140,9 +142,15 @@ PROCESS_TILE = {
 }
 
 
-def process_tile(top, tile, tile_features):
-    """ Process a tile emits BELs to module top. """
-    tile_type = get_tile_type(top.conn, tile)
+def process_tile(top, tile, tile_features, tile_type=None):
+    """ Process a tile emits BELs to module top.
+
+    tile_type may be provided when already known, otherwise it is looked up
+    in the connection database.
+
+    """
+    if tile_type is None:
+        tile_type = get_tile_type(top.conn, tile)
 
     PROCESS_TILE[tile_type](top.conn, top, tile, tile_features)
 
@@ -174,12 +182,15 @@ def process_set_feature(set_feature):
     """
 
     # Get tile name
+    tile = set_feature.feature.partition(".")[0]
+    if "IOI3_SING" not in tile:
+        return set_feature
+
     parts = set_feature.feature.split(".")
-    tile = parts[0]
 
     # Some wires in [LR]IOI3_SING tiles have different names than in regular
     # IOI3 tiles. Rename them in PIP features.
-    if "IOI3_SING" in tile and len(parts) == 3:
+    if len(parts) == 3:
 
         # Rename wires
         wires = [parts[1], parts[2]]
@@ -325,6 +336,11 @@ def load_net_list(conn, vpr_capnp_schema_dir, rr_graph_file, route_file,
     return net_map
 
 
+def write_lines(f, lines):
+    """ Write each line followed by a newline, like print(line, file=f). """
+    f.writelines('{}\n'.format(line) for line in lines)
+
+
 def main():
     parser = argparse.ArgumentParser(description=__doc__)
     parser.add_argument(
@@ -407,6 +423,15 @@ def main():
     conn = sqlite3.connect(
         'file:{}?mode=ro'.format(args.connection_database), uri=True)
 
+    # The database is only read, mostly through many small lookups, so map it
+    # into memory and give sqlite a larger page cache.
+    conn.executescript("""
+PRAGMA mmap_size = 268435456;
+PRAGMA cache_size = -65536;
+PRAGMA temp_store = MEMORY;
+PRAGMA query_only = 1;
+""")
+
     db = prjxray.db.Database(args.db_root, args.part)
     grid = db.grid()
 
@@ -414,7 +439,7 @@ def main():
         bit2fasm(args.db_root, db, grid, args.bit_file, args.fasm_file,
                  args.bitread, args.part)
 
-    tiles = {}
+    tiles = defaultdict(list)
 
     top = Module(db, grid, conn, name=args.top)
     if args.eblif:
@@ -462,25 +487,32 @@ def main():
 
     top.set_default_iostandard(args.iostandard, args.drive)
 
+    # Resolve all tile types with one query rather than one query per tile.
+    tile_types = get_tile_types(conn)
+
+    # Tiles without a BEL model (e.g. INT tiles) only contribute PIPs, so do
+    # not keep their features around.
+    pip_only_tiles = set(tile for tile, tile_type in tile_types.items()
+                         if PROCESS_TILE.get(tile_type) is null_process)
+
+    maybe_add_pip = top.maybe_add_pip
     for fasm_line in fasm.parse_fasm_filename(args.fasm_file):
         if not fasm_line.set_feature:
             continue
 
         set_feature = process_set_feature(fasm_line.set_feature)
+        feature = set_feature.feature
 
-        parts = set_feature.feature.split('.')
-        tile = parts[0]
-
-        if tile not in tiles:
-            tiles[tile] = []
-
-        tiles[tile].append(set_feature)
+        tile, _, rest = feature.partition('.')
+        if tile not in pip_only_tiles:
+            tiles[tile].append(set_feature)
 
-        if len(parts) == 3 and set_feature.value == 1:
-            top.maybe_add_pip(set_feature.feature)
+        # Features with exactly 3 parts (tile.wire.wire) are PIPs.
+        if rest.count('.') == 1 and set_feature.value == 1:
+            maybe_add_pip(feature)
 
     for tile, tile_features in tiles.items():
-        process_tile(top, tile, tile_features)
+        process_tile(top, tile, tile_features, tile_types[tile])
 
     # Check if the PS7 is present in the tilegrid. If so then insert it.
     pss_tile, ps7_site = get_ps7_site(db)
@@ -511,21 +543,14 @@ def main():
     if args.verilog_file:
         assert args.xdc_file
         with open(args.verilog_file, 'w') as f:
-            for line in top.output_verilog():
-                print(line, file=f)
+            write_lines(f, top.output_verilog())
 
         with open(args.xdc_file, 'w') as f:
-            for line in top.output_bel_locations():
-                print(line, file=f)
-
-            for line in top.output_nets():
-                print(line, file=f)
-
-            for line in top.output_disabled_drcs():
-                print(line, file=f)
-
-            for line in top.output_extra_tcl():
-                print(line, file=f)
+            write_lines(
+                f,
+                itertools.chain(top.output_bel_locations(), top.output_nets(),
+                                top.output_disabled_drcs(),
+                                top.output_extra_tcl()))
 
     if args.logical_netlist:
         assert args.physical_netlist
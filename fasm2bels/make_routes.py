@@ -52,6 +52,28 @@ def create_check_downstream_default(conn, db):
     """ Returns check_for_default function. """
     c = conn.cursor()
 
+    @functools.lru_cache(maxsize=None)
+    def get_always_ppips(phy_tile_type_pkey):
+        """ Returns map of upstream wire to (downstream wire, ppip) for the
+        "always" ppips of a tile type. """
+        c.execute("SELECT name FROM tile_type WHERE pkey = ?",
+                  (phy_tile_type_pkey, ))
+        tile_type = c.fetchone()[0]
+
+        tile = db.get_tile_segbits(tile_type)
+
+        always_ppips = {}
+        for k, ppip_type in tile.ppips.items():
+            parts = k.split('.')
+            assert len(parts) == 3
+            assert parts[0] == tile_type
+
+            if ppip_type == PsuedoPipType.ALWAYS and \
+                    parts[2] not in always_ppips:
+                always_ppips[parts[2]] = parts[1], k
+
+        return always_ppips
+
     @functools.lru_cache(maxsize=None)
     def check_for_default(wire_in_tile_pkey):
         """ Returns downstream wire_in_tile_pkey from given wire_in_tile_pkey.
@@ -65,27 +87,17 @@ def create_check_downstream_default(conn, db):
             (wire_in_tile_pkey, ))
         name, phy_tile_type_pkey = c.fetchone()
 
-        c.execute("SELECT name FROM tile_type WHERE pkey = ?",
-                  (phy_tile_type_pkey, ))
-        tile_type = c.fetchone()[0]
-
-        tile = db.get_tile_segbits(tile_type)
+        always_ppip = get_always_ppips(phy_tile_type_pkey).get(name)
+        if always_ppip is None:
+            return None, None
 
-        for k in tile.ppips:
-            parts = k.split('.')
-            assert len(parts) == 3
-            assert parts[0] == tile_type
-
-            if parts[2] == name and tile.ppips[k] == PsuedoPipType.ALWAYS:
-                downstream_wire = parts[1]
-                c.execute(
-                    "SELECT pkey FROM wire_in_tile WHERE name = ? AND phy_tile_type_pkey = ?;",
-                    (downstream_wire, phy_tile_type_pkey))
-                downstream_wire_in_tile_pkey = c.fetchone()[0]
-
-                return downstream_wire_in_tile_pkey, k
+        downstream_wire, k = always_ppip
+        c.execute(
+            "SELECT pkey FROM wire_in_tile WHERE name = ? AND phy_tile_type_pkey = ?;",
+            (downstream_wire, phy_tile_type_pkey))
+        downstream_wire_in_tile_pkey = c.fetchone()[0]
 
-        return None, None
+        return downstream_wire_in_tile_pkey, k
 
     return check_for_default
 
@@ -354,6 +366,26 @@ def create_check_for_default(db, conn):
     """ Returns check_for_default function. """
     c = conn.cursor()
 
+    @functools.lru_cache(maxsize=None)
+    def get_ppips(phy_tile_type_pkey):
+        """ Returns map of downstream wire to (upstream wire, ppip) for the
+        ppips of a tile type. """
+        c.execute("SELECT name FROM tile_type WHERE pkey = ?",
+                  (phy_tile_type_pkey, ))
+        tile_type = c.fetchone()[0]
+
+        tile = db.get_tile_segbits(tile_type)
+
+        ppips = {}
+        for k in tile.ppips:
+            parts = k.split('.')
+            assert len(parts) == 3
+
+            if parts[0] == tile_type and parts[1] not in ppips:
+                ppips[parts[1]] = parts[2], k
+
+        return tile, ppips
+
     @functools.lru_cache(maxsize=None)
     def check_for_default(wire_in_tile_pkey):
         """ Returns upstream wire_in_tile_pkey from given wire_in_tile_pkey.
@@ -371,12 +403,6 @@ def create_check_for_default(db, conn):
             (wire_in_tile_pkey, ))
         name, phy_tile_type_pkey = c.fetchone()
 
-        c.execute("SELECT name FROM tile_type WHERE pkey = ?",
-                  (phy_tile_type_pkey, ))
-        tile_type = c.fetchone()[0]
-
-        tile = db.get_tile_segbits(tile_type)
-
         # The xMUX wires have multiple "hint" connections.  Deal with them
         # specially.
         if name in [
@@ -406,25 +432,22 @@ def create_check_for_default(db, conn):
 
             return upstream_wire_in_tile_pkey, None
 
-        for k in tile.ppips:
-            parts = k.split('.')
-            assert len(parts) == 3
-            if k.startswith('{}.{}.'.format(tile_type, name)):
-                assert tile.ppips[k] in [
-                    PsuedoPipType.ALWAYS, PsuedoPipType.DEFAULT
-                ], (k, tile.ppips[k])
+        tile, ppips = get_ppips(phy_tile_type_pkey)
+        ppip = ppips.get(name)
+        if ppip is None:
+            return None, None
 
-                upstream_wire = parts[2]
+        upstream_wire, k = ppip
+        assert tile.ppips[k] in [PsuedoPipType.ALWAYS,
+                                 PsuedoPipType.DEFAULT], (k, tile.ppips[k])
 
-                c.execute(
-                    "SELECT pkey FROM wire_in_tile WHERE name = ? AND phy_tile_type_pkey = ?;",
-                    (upstream_wire, phy_tile_type_pkey))
-
-                upstream_wire_in_tile_pkey = c.fetchone()[0]
+        c.execute(
+            "SELECT pkey FROM wire_in_tile WHERE name = ? AND phy_tile_type_pkey = ?;",
+            (upstream_wire, phy_tile_type_pkey))
 
-                return upstream_wire_in_tile_pkey, k
+        upstream_wire_in_tile_pkey = c.fetchone()[0]
 
-        return None, None
+        return upstream_wire_in_tile_pkey, k
 
     return check_for_default
 
@@ -439,13 +462,17 @@ def replace_tile(c, pip, phy_tile_pkey):
     Returns pip string in form of "{tile_name}.{wire1}.{wire0}".
 
     """
-    c.execute("SELECT name FROM phy_tile WHERE pkey = ?", (phy_tile_pkey, ))
-    tile_name = c.fetchone()[0]
-
     c.execute(
-        "SELECT name FROM tile_type WHERE pkey = (SELECT tile_type_pkey FROM phy_tile WHERE pkey = ?)",
-        (phy_tile_pkey, ))
-    tile_type = c.fetchone()[0]
+        """
+SELECT
+  phy_tile.name,
+  tile_type.name
+FROM
+  phy_tile
+  INNER JOIN tile_type ON tile_type.pkey = phy_tile.tile_type_pkey
+WHERE
+  phy_tile.pkey = ?;""", (phy_tile_pkey, ))
+    tile_name, tile_type = c.fetchone()
     assert pip.startswith(tile_type), (pip, tile_name, tile_type)
     assert pip[len(tile_type)] == '.', (pip, tile_name)
     return tile_name + pip[len(tile_type):]
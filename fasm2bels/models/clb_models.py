@@ -18,9 +18,212 @@
 # SPDX-License-Identifier: Apache-2.0
 
 from .verilog_modeling import Bel, Site
+import functools
 import math
+import weakref
 
+# Map of Site objects -> decoded LUT modes, see decode_dram.
+_DRAM_MODES_CACHE = weakref.WeakKeyDictionary()
 
+# Map of grid -> map of tile name -> CLB sites sorted by X, see get_clb_site.
+_CLB_SITES_CACHE = weakref.WeakKeyDictionary()
+
+# Neighbouring LUT rows within a SLICE.
+_PREV_LUT = {'B': 'A', 'C': 'B', 'D': 'C'}
+_NEXT_LUT = {'A': 'B', 'B': 'C', 'C': 'D'}
+
+# Bit for each LUT row when tracking a set of rows as an integer bitmap.
+_LUT_BIT = {lut: 1 << idx for idx, lut in enumerate('ABCD')}
+
+# Feature names probed for every SLICE, built once rather than per call.
+_LUT_RAM = {lut: '{}LUT.RAM'.format(lut) for lut in 'ABCD'}
+_LUT_SMALL = {lut: '{}LUT.SMALL'.format(lut) for lut in 'ABCD'}
+_LUT_SRL = {lut: '{}LUT.SRL'.format(lut) for lut in 'ABCD'}
+_LUT_SRL_FEATURES = frozenset(_LUT_SRL.values())
+_LUT_DI1MUX = {lut: '{lut}LUT.DI1MUX.{lut}I'.format(lut=lut) for lut in 'ABC'}
+_FFMUX_XOR = {lut: '{}FFMUX.XOR'.format(lut) for lut in 'ABCD'}
+_FFMUX_CY = {lut: '{}FFMUX.CY'.format(lut) for lut in 'ABCD'}
+_OUTMUX_XOR = {lut: '{}OUTMUX.XOR'.format(lut) for lut in 'ABCD'}
+_OUTMUX_CY = {lut: '{}OUTMUX.CY'.format(lut) for lut in 'ABCD'}
+_FF_ZRST = {(lut, ff5): '{}{}FF.ZRST'.format(lut, '5' if ff5 else '')
+            for lut in 'ABCD' for ff5 in (False, True)}
+_FF_ZINI = {(lut, ff5): '{}{}FF.ZINI'.format(lut, '5' if ff5 else '')
+            for lut in 'ABCD' for ff5 in (False, True)}
+
+
+def _mux_rules(mux, inputs):
+    """ Build FFMUX / OUTMUX rules for process_slice.
+
+    Each input is (mux input, internal source, requires CARRY4).  Returns a
+    tuple of (feature, internal source, site pips, requires CARRY4).
+
+    """
+    return tuple(('{}.{}'.format(mux, pin), source, [('site_pip', mux, pin)],
+                  needs_carry4) for pin, source, needs_carry4 in inputs)
+
+
+# Wide mux (or SRL MC31) inputs of each FFMUX / OUTMUX.
+_FFMUX_WIDE_INPUTS = {
+    'A': [('F7', 'F7AMUX_O', False)],
+    'B': [('F8', 'F8MUX_O', False)],
+    'C': [('F7', 'F7BMUX_O', False)],
+    'D': [('MC31', 'AMC31', False)],
+}
+_OUTMUX_WIDE_INPUTS = {
+    'A': [('F7', 'F7AMUX_O', False)],
+    'B': [('F8', 'F8MUX_O', False)],
+    'C': [('F7', 'F7BMUX_O', False)],
+    'D': [],
+}
+
+# FFMUX and OUTMUX rules per LUT, tried in order by process_slice.  An
+# internal source of None selects the xX site pin for the FFMUX, and the
+# dedicated O6 output for the OUTMUX.
+_FFMUX_RULES = {}
+_OUTMUX_RULES = {}
+for _lut in 'ABCD':
+    _FFMUX_RULES[_lut] = _mux_rules(
+        _lut + 'FFMUX',
+        [(_lut + 'X', None, False)] + _FFMUX_WIDE_INPUTS[_lut] + [
+            ('O5', _lut + 'O5', False),
+            ('O6', _lut + 'O6', False),
+            ('CY', _lut + '_CY', True),
+            ('XOR', _lut + '_XOR', True),
+        ])
+    _OUTMUX_RULES[_lut] = _mux_rules(
+        _lut + 'OUTMUX',
+        [(_lut + '5Q', _lut + '5Q', False)] + _OUTMUX_WIDE_INPUTS[_lut] + [
+            ('O5', _lut + 'O5', False),
+            ('O6', None, False),
+            ('CY', _lut + '_CY', True),
+            ('XOR', _lut + '_XOR', True),
+        ])
+del _lut
+
+# Bit assigned to each feature used by decode_dram.  This allows the DRAM
+# decode to run with one set intersection and integer bit tests.  The
+# xLUT.RAM features use the LUT row bits.
+_SMALL_BIT = {lut: 1 << (4 + idx) for idx, lut in enumerate('ABCD')}
+_DI_BIT = {lut: 1 << (8 + idx) for idx, lut in enumerate('ABC')}
+_WA7USED_BIT = 1 << 11
+_WA8USED_BIT = 1 << 12
+_RAM_ALL_BITS = 0xF
+_SMALL_ALL_BITS = 0xF0
+
+_DRAM_FEATURE_BITS = {'WA7USED': _WA7USED_BIT, 'WA8USED': _WA8USED_BIT}
+for _lut in 'ABCD':
+    _DRAM_FEATURE_BITS[_LUT_RAM[_lut]] = _LUT_BIT[_lut]
+    _DRAM_FEATURE_BITS[_LUT_SMALL[_lut]] = _SMALL_BIT[_lut]
+for _lut in 'ABC':
+    _DRAM_FEATURE_BITS[_LUT_DI1MUX[_lut]] = _DI_BIT[_lut]
+del _lut
+
+_DRAM_FEATURES = frozenset(_DRAM_FEATURE_BITS)
+
+# FF cell information indexed by (FFSYNC << 2) | (LATCH << 1) | ZRST, see
+# ff_bel.  Entries are (module name, clock pin, clock enable pin, reset pin).
+_FF_TABLE = (
+    ('FDPE', 'C', 'CE', 'PRE'),
+    ('FDCE', 'C', 'CE', 'CLR'),
+    ('LDPE', 'G', 'GE', 'PRE'),
+    ('LDCE', 'G', 'GE', 'CLR'),
+    ('FDSE', 'C', 'CE', 'S'),
+    ('FDRE', 'C', 'CE', 'R'),
+    None,
+    None,
+)
+
+
+def _address_sinks(*specs, count=6):
+    """ Build Site.add_sinks tuples for LUT address pins.
+
+    Each spec is a tuple of (cell pin format, LUT row of the site pins,
+    BEL name, real cell pin format or None).  Sinks for all specs are
+    interleaved by address bit.
+
+    """
+    return tuple((cell_pin.format(idx), '{}{}'.format(lut, idx + 1), bel_name,
+                  'A{}'.format(idx + 1),
+                  None if real_cell_pin is None else real_cell_pin.format(idx))
+                 for idx in range(count)
+                 for cell_pin, lut, bel_name, real_cell_pin in specs)
+
+
+# Address pin sinks for the DRAM BELs emitted by process_slice.
+_RAM256X1S_ADDR_SINKS = _address_sinks(
+    ('A[{}]', 'D', 'D6LUT', None),
+    # Fake sinks as they need to be routed to
+    ('ADDR_C[{}]', 'C', 'C6LUT', None),
+    ('ADDR_B[{}]', 'B', 'B6LUT', None),
+    ('ADDR_A[{}]', 'A', 'A6LUT', None),
+)
+_RAM128X1S_CD_ADDR_SINKS = _address_sinks(
+    ('A{}', 'D', 'D6LUT', None),
+    # Fake sink to route through the C[N] pins
+    ('ADDR_C{}', 'C', 'C6LUT', None),
+)
+_RAM128X1S_AB_ADDR_SINKS = _address_sinks(
+    ('A{}', 'B', 'B6LUT', None),
+    # Fake sink to route through the A[N] pins
+    ('ADDR_A{}', 'A', 'A6LUT', None),
+)
+_RAM128X1D_ADDR_SINKS = _address_sinks(
+    ('A[{}]', 'D', 'D6LUT', None),
+    # Fake sink to route through the C[N] pins
+    ('ADDR_C[{}]', 'C', 'C6LUT', 'A[{}]'),
+    ('DPRA[{}]', 'B', 'B6LUT', None),
+    # Fake sink to route through the A[N] pins
+    ('DATA_A[{}]', 'A', 'A6LUT', 'DPRA[{}]'),
+)
+_RAMXM_ADDR_SINKS = {}
+_RAM64X1S_ADDR_SINKS = {}
+_RAM32X1S_ADDR_SINKS = {}
+_RAM64X1D_ADDR_SINKS = {}
+_RAM32X1D_ADDR_SINKS = {}
+for _lut in 'ABCD':
+    _RAMXM_ADDR_SINKS[_lut] = _address_sinks(('ADDR{}[{{}}]'.format(_lut),
+                                              _lut, _lut + '6LUT', None))
+    _RAM64X1S_ADDR_SINKS[_lut] = _address_sinks(('A{}', _lut, _lut + '6LUT',
+                                                 None))
+
+    for _sub_bel in '65':
+        _RAM32X1S_ADDR_SINKS[_lut, _sub_bel] = _address_sinks(
+            ('A{}', _lut, _lut + _sub_bel + 'LUT', None), count=5)
+
+for _lut in 'BD':
+    _prev = _PREV_LUT[_lut]
+    _RAM64X1D_ADDR_SINKS[_lut] = _address_sinks(
+        ('A{}', _lut, _lut + '6LUT', None),
+        ('DPRA{}', _prev, _prev + '6LUT', None),
+    )
+
+    for _sub_bel in '65':
+        _RAM32X1D_ADDR_SINKS[_lut, _sub_bel] = _address_sinks(
+            ('A{}', _lut, _lut + _sub_bel + 'LUT', None),
+            ('DPRA{}', _prev, _prev + _sub_bel + 'LUT', None),
+        )
+del _lut, _sub_bel, _prev
+
+# (BEL pin, cell pin) address pin mapping of the LUT6/LUT5 physical BELs.
+_LUT_PHYS_PINS = tuple(
+    ('A{}'.format(idx + 1), 'I{}'.format(idx)) for idx in range(6))
+
+# Address pin sinks for the LUT6_2 BELs emitted by create_lut.
+_LUT_SINKS = {
+    lut: _address_sinks(('I{}', lut, lut + '6LUT', None))
+    for lut in 'ABCD'
+}
+
+# Names of the SRL BELs for each row, (SRL16 in 6LUT, SRL16 in 5LUT, SRL32).
+_SRL_BEL_NAMES = {
+    row: ('{}6SRL'.format(row), '{}5SRL'.format(row), '{}6SRL_32'.format(row))
+    for row in 'ABCD'
+}
+
+
+# INIT values repeat heavily across a design (e.g. constant LUTs), so cache
+# the Verilog literal formatting.
+@functools.lru_cache(maxsize=16384)
 def make_hex_verilog_value(width, value):
     return "{width}'h{{:0{format_width}X}}".format(
         width=width, format_width=int(math.ceil(width / 4))).format(value)
@@ -28,30 +231,78 @@ def make_hex_verilog_value(width, value):
 
 def get_clb_site(db, grid, tile, site):
     """ Return the prjxray.tile.Site object for the given CLB site. """
-    gridinfo = grid.gridinfo_at_tilename(tile)
-    tile_type = db.get_tile_type(gridinfo.tile_type)
+    tile_sites = _CLB_SITES_CACHE.setdefault(grid, {})
 
-    sites = sorted(tile_type.get_instance_sites(gridinfo), key=lambda x: x.x)
+    sites = tile_sites.get(tile)
+    if sites is None:
+        gridinfo = grid.gridinfo_at_tilename(tile)
+        tile_type = db.get_tile_type(gridinfo.tile_type)
+
+        sites = sorted(
+            tile_type.get_instance_sites(gridinfo), key=lambda x: x.x)
+        tile_sites[tile] = sites
 
     return sites[int(site[-1])]
 
 
 def get_lut_init(site, lut):
-    """ Return the INIT value for the specified LUT. """
-    init = site.decode_multi_bit_feature('{}LUT.INIT'.format(lut))
-    return "64'b{:064b}".format(init)
+    """ Return the INIT value for the specified LUT as integer. """
+    return site.decode_multi_bit_feature('{}LUT.INIT'.format(lut))
+
+
+@functools.lru_cache(maxsize=16384)
+def _lut_hex_init(init):
+    return "64'h{:016x}".format(init)
 
 
 def get_lut_hex_init(site, lut):
     """ Return the INIT value for the specified LUT. """
-    init = site.decode_multi_bit_feature('{}LUT.INIT'.format(lut))
-    return "64'h{:016x}".format(init)
+    return _lut_hex_init(get_lut_init(site, lut))
 
 
 def get_shifted_lut_init(site, lut, shift=0):
-    """ Return the shifted INIT value as integer. The init input is a string."""
-    int_init = site.decode_multi_bit_feature('{}LUT.INIT'.format(lut))
-    return int_init << shift
+    """ Return the shifted INIT value as integer. """
+    return get_lut_init(site, lut) << shift
+
+
+def compress_even_bits(value):
+    """ Packs the even bits of a 64-bit value into the low 32 bits.
+
+    >>> hex(compress_even_bits(0x5555555555555555))
+    '0xffffffff'
+    >>> hex(compress_even_bits(0xAAAAAAAAAAAAAAAA))
+    '0x0'
+    >>> hex(compress_even_bits(0x0000000000000F0F))
+    '0x33'
+
+    """
+    value &= 0x5555555555555555
+    value = (value | (value >> 1)) & 0x3333333333333333
+    value = (value | (value >> 2)) & 0x0F0F0F0F0F0F0F0F
+    value = (value | (value >> 4)) & 0x00FF00FF00FF00FF
+    value = (value | (value >> 8)) & 0x0000FFFF0000FFFF
+    value = (value | (value >> 16)) & 0x00000000FFFFFFFF
+    return value
+
+
+def spread_even_bits(value):
+    """ Spreads the low 32 bits of value onto the even bits of a 64-bit value.
+
+    Inverse of compress_even_bits.
+
+    >>> hex(spread_even_bits(0xFFFFFFFF))
+    '0x5555555555555555'
+    >>> hex(spread_even_bits(0x33))
+    '0x505'
+
+    """
+    value &= 0x00000000FFFFFFFF
+    value = (value | (value << 16)) & 0x0000FFFF0000FFFF
+    value = (value | (value << 8)) & 0x00FF00FF00FF00FF
+    value = (value | (value << 4)) & 0x0F0F0F0F0F0F0F0F
+    value = (value | (value << 2)) & 0x3333333333333333
+    value = (value | (value << 1)) & 0x5555555555555555
+    return value
 
 
 def create_lut(site, lut):
@@ -60,13 +311,7 @@ def create_lut(site, lut):
     bel_name = lut + '6LUT'
     bel.set_bel(bel_name)
 
-    for idx in range(6):
-        site.add_sink(
-            bel=bel,
-            cell_pin='I{}'.format(idx),
-            sink_site_pin='{}{}'.format(lut, idx + 1),
-            bel_name=bel_name,
-            bel_pin='A{}'.format(idx + 1))
+    site.add_sinks(bel, _LUT_SINKS[lut])
 
     site.add_internal_source(
         bel=bel,
@@ -81,18 +326,17 @@ def create_lut(site, lut):
         bel_name=lut + '5LUT',
         bel_pin='O5')
 
-    bel.parameters['INIT'] = get_lut_hex_init(site, lut)
+    init = get_lut_init(site, lut)
+    bel.parameters['INIT'] = _lut_hex_init(init)
     site.add_bel(bel)
 
     bel_lut6 = Bel('LUT6', 'LUT6')
     bel_lut6.set_bel(bel_name)
-    bel_lut6.parameters['INIT'] = get_lut_hex_init(site, lut)
+    bel_lut6.parameters['INIT'] = bel.parameters['INIT']
 
-    for idx in range(6):
+    for bel_pin, cell_pin in _LUT_PHYS_PINS:
         bel_lut6.map_bel_pin_to_cell_pin(
-            bel_name=bel_name,
-            bel_pin='A{}'.format(idx + 1),
-            cell_pin='I{}'.format(idx))
+            bel_name=bel_name, bel_pin=bel_pin, cell_pin=cell_pin)
 
     bel_lut6.map_bel_pin_to_cell_pin(
         bel_name=bel_name, bel_pin='O6', cell_pin='O')
@@ -104,14 +348,11 @@ def create_lut(site, lut):
     bel_name = lut + '5LUT'
     bel_lut5.set_bel(bel_name)
 
-    init = site.decode_multi_bit_feature('{}LUT.INIT'.format(lut))
     bel_lut5.parameters['INIT'] = "32'h{:08x}".format(init & 0xFFFFFFFF)
 
-    for idx in range(5):
+    for bel_pin, cell_pin in _LUT_PHYS_PINS[:5]:
         bel_lut5.map_bel_pin_to_cell_pin(
-            bel_name=bel_name,
-            bel_pin='A{}'.format(idx + 1),
-            cell_pin='I{}'.format(idx))
+            bel_name=bel_name, bel_pin=bel_pin, cell_pin=cell_pin)
 
     bel_lut5.map_bel_pin_to_cell_pin(
         bel_name=bel_name, bel_pin='O5', cell_pin='O')
@@ -123,11 +364,12 @@ def create_lut(site, lut):
 def get_srl32_init(site, srl):
 
     lut_init = get_lut_init(site, srl)
-    bits = lut_init.replace("64'b", "")
 
-    assert bits[1::2] == bits[::2]
+    # Each SRL bit is stored twice, in bit 2n and 2n+1 of the LUT INIT.
+    assert (lut_init ^ (lut_init >> 1)) & 0x5555555555555555 == 0
+    srl_init = compress_even_bits(lut_init)
 
-    return make_hex_verilog_value(32, int(bits[::2], 2))
+    return make_hex_verilog_value(32, srl_init)
 
 
 def create_srl32(site, srl, up_chain):
@@ -143,7 +385,7 @@ def create_srl32(site, srl, up_chain):
         bel_pin='CLK')
 
     if up_chain:
-        srl_plus_1 = chr(ord(srl) + 1)
+        srl_plus_1 = _NEXT_LUT[srl]
         site.connect_internal(
             bel=bel,
             cell_pin='D',
@@ -201,14 +443,13 @@ def get_srl16_init(site, srl):
     """
 
     lut_init = get_lut_init(site, srl)
-    bits = lut_init.replace("64'b", "")
 
-    assert bits[1::2] == bits[::2]
+    # Each SRL bit is stored twice, in bit 2n and 2n+1 of the LUT INIT.
+    assert (lut_init ^ (lut_init >> 1)) & 0x5555555555555555 == 0
+    srl_init = compress_even_bits(lut_init)
 
-    srl_init = bits[::2]
-    return make_hex_verilog_value(16, int(srl_init[:16],
-                                          2)), make_hex_verilog_value(
-                                              16, int(srl_init[16:], 2))
+    return make_hex_verilog_value(16, srl_init >> 16), make_hex_verilog_value(
+        16, srl_init & 0xFFFF)
 
 
 def create_srl16(site, srl, srl_type, part, up_chain):
@@ -227,7 +468,7 @@ def create_srl16(site, srl, srl_type, part, up_chain):
 
     if part == '5':
         if up_chain:
-            srl_plus_1 = chr(ord(srl) + 1)
+            srl_plus_1 = _NEXT_LUT[srl]
             site.connect_internal(
                 bel,
                 'D',
@@ -292,24 +533,30 @@ def decode_dram(site):
     """ Decode the modes of each LUT in the slice based on set features.
 
     Returns dictionary of lut position (e.g. 'A') to lut mode.
+
+    The result is cached per site, so callers must not modify the returned
+    dictionary.
     """
-    lut_ram = {}
-    lut_small = {}
-    for lut in 'ABCD':
-        lut_ram[lut] = site.has_feature('{}LUT.RAM'.format(lut))
-        lut_small[lut] = site.has_feature('{}LUT.SMALL'.format(lut))
+    lut_modes = _DRAM_MODES_CACHE.get(site)
+    if lut_modes is None:
+        lut_modes = _decode_dram(site)
+        _DRAM_MODES_CACHE[site] = lut_modes
+
+    return lut_modes
+
+
+def _decode_dram(site):
+    state = 0
+    for feature in _DRAM_FEATURES.intersection(site.features):
+        state |= _DRAM_FEATURE_BITS[feature]
 
-    di = {}
-    for lut in 'ABC':
-        di[lut] = site.has_feature('{}LUT.DI1MUX.{}I'.format(lut, lut))
+    all_ram = (state & _RAM_ALL_BITS) == _RAM_ALL_BITS
+    all_small = (state & _SMALL_ALL_BITS) == _SMALL_ALL_BITS
 
     lut_modes = {}
-    if site.has_feature('WA8USED'):
-        assert site.has_feature('WA7USED')
-        assert lut_ram['A']
-        assert lut_ram['B']
-        assert lut_ram['C']
-        assert lut_ram['D']
+    if state & _WA8USED_BIT:
+        assert state & _WA7USED_BIT
+        assert all_ram
 
         lut_modes['A'] = 'RAM256X1S'
         lut_modes['B'] = 'RAM256X1S'
@@ -317,11 +564,11 @@ def decode_dram(site):
         lut_modes['D'] = 'RAM256X1S'
         return lut_modes
 
-    if site.has_feature('WA7USED'):
-        if not lut_ram['A']:
-            assert not lut_ram['B']
-            assert lut_ram['C']
-            assert lut_ram['D']
+    if state & _WA7USED_BIT:
+        if not state & _LUT_BIT['A']:
+            assert not state & _LUT_BIT['B']
+            assert state & _LUT_BIT['C']
+            assert state & _LUT_BIT['D']
             lut_modes['A'] = 'LUT'
             lut_modes['B'] = 'LUT'
             lut_modes['C'] = 'RAM128X1S'
@@ -329,17 +576,15 @@ def decode_dram(site):
 
             return lut_modes
 
-        assert lut_ram['B']
+        assert state & _LUT_BIT['B']
 
-        if di['B']:
+        if state & _DI_BIT['B']:
             lut_modes['A'] = 'RAM128X1S'
             lut_modes['B'] = 'RAM128X1S'
             lut_modes['C'] = 'RAM128X1S'
             lut_modes['D'] = 'RAM128X1S'
         else:
-            assert lut_ram['B']
-            assert lut_ram['C']
-            assert lut_ram['D']
+            assert all_ram
 
             lut_modes['A'] = 'RAM128X1D'
             lut_modes['B'] = 'RAM128X1D'
@@ -348,9 +593,6 @@ def decode_dram(site):
 
         return lut_modes
 
-    all_ram = all(lut_ram[lut] for lut in 'ABCD')
-    all_small = all(lut_small[lut] for lut in 'ABCD')
-
     if all_ram and not all_small:
         return {'D': 'RAM64M'}
     elif all_ram and all_small:
@@ -358,42 +600,42 @@ def decode_dram(site):
     else:
         # Remaining modes:
         # RAM32X1S, RAM32X1D, RAM64X1S, RAM64X1D
-        remaining = set('ABCD')
+        remaining = 0xF
 
         for lut in 'AC':
-            if lut_ram[lut] and di[lut]:
-                remaining.remove(lut)
+            if state & _LUT_BIT[lut] and state & _DI_BIT[lut]:
+                remaining &= ~_LUT_BIT[lut]
 
-                if lut_small[lut]:
+                if state & _SMALL_BIT[lut]:
                     lut_modes[lut] = 'RAM32X1S'
                 else:
                     lut_modes[lut] = 'RAM64X1S'
 
         for lut in 'BD':
-            if not lut_ram[lut]:
+            if not state & _LUT_BIT[lut]:
                 continue
 
-            minus_one = chr(ord(lut) - 1)
-            if minus_one in remaining:
-                if lut_ram[minus_one]:
-                    remaining.remove(lut)
-                    remaining.remove(minus_one)
-                    if lut_small[lut]:
+            minus_one = _PREV_LUT[lut]
+            if remaining & _LUT_BIT[minus_one]:
+                if state & _LUT_BIT[minus_one]:
+                    remaining &= ~(_LUT_BIT[lut] | _LUT_BIT[minus_one])
+                    if state & _SMALL_BIT[lut]:
                         lut_modes[lut] = 'RAM32X1D'
                         lut_modes[minus_one] = 'RAM32X1D'
                     else:
                         lut_modes[lut] = 'RAM64X1D'
                         lut_modes[minus_one] = 'RAM64X1D'
 
-            if lut in remaining:
-                remaining.remove(lut)
-                if lut_small[lut]:
+            if remaining & _LUT_BIT[lut]:
+                remaining &= ~_LUT_BIT[lut]
+                if state & _SMALL_BIT[lut]:
                     lut_modes[lut] = 'RAM32X1S'
                 else:
                     lut_modes[lut] = 'RAM64X1S'
 
-        for lut in remaining:
-            lut_modes[lut] = 'LUT'
+        for lut in 'ABCD':
+            if remaining & _LUT_BIT[lut]:
+                lut_modes[lut] = 'LUT'
 
         return lut_modes
 
@@ -409,23 +651,20 @@ def ff_bel(site, lut, ff5):
         init parameter).
 
     """
-    ffsync = site.has_feature('FFSYNC')
-    latch = site.has_feature('LATCH') and not ff5
-    zrst = site.has_feature('{}{}FF.ZRST'.format(lut, '5' if ff5 else ''))
-    zini = site.has_feature('{}{}FF.ZINI'.format(lut, '5' if ff5 else ''))
+    features = site.features
+    ffsync = 'FFSYNC' in features
+    latch = 'LATCH' in features and not ff5
+    zrst = _FF_ZRST[lut, ff5] in features
+    zini = _FF_ZINI[lut, ff5] in features
     init = int(not zini)
 
     if latch:
         assert not ffsync
 
-    return {
-        (False, False, False): ('FDPE', 'C', 'CE', 'PRE', init),
-        (True, False, False): ('FDSE', 'C', 'CE', 'S', init),
-        (True, False, True): ('FDRE', 'C', 'CE', 'R', init),
-        (False, False, True): ('FDCE', 'C', 'CE', 'CLR', init),
-        (False, True, True): ('LDCE', 'G', 'GE', 'CLR', init),
-        (False, True, False): ('LDPE', 'G', 'GE', 'PRE', init),
-    }[(ffsync, latch, zrst)]
+    ff = _FF_TABLE[(ffsync << 2) | (latch << 1) | zrst]
+    assert ff is not None, (ffsync, latch, zrst)
+
+    return ff + (init, )
 
 
 def cleanup_carry4(top, site):
@@ -442,42 +681,37 @@ def cleanup_carry4(top, site):
 
         # Simplest check is if the CARRY4 has output in used by either the OUTMUX
         # or the FFMUX, if any of these muxes are enable, CARRY4 must remain.
-        co_in_use = [False for _ in range(4)]
-        o_in_use = [False for _ in range(4)]
+        #
+        # Bit idx of co_in_use / o_in_use is set when CO[idx] / O[idx] is used.
+        features = site.features
+        co_in_use = 0
+        o_in_use = 0
         for idx, lut in enumerate('ABCD'):
-            if site.has_feature('{}FFMUX.XOR'.format(lut)):
-                o_in_use[idx] = True
+            if _FFMUX_XOR[lut] in features or _OUTMUX_XOR[lut] in features:
+                o_in_use |= 1 << idx
 
-            if site.has_feature('{}FFMUX.CY'.format(lut)):
-                co_in_use[idx] = True
+            if _FFMUX_CY[lut] in features or _OUTMUX_CY[lut] in features:
+                co_in_use |= 1 << idx
 
-            if site.has_feature('{}OUTMUX.XOR'.format(lut)):
-                o_in_use[idx] = True
+        # No outputs in the SLICE use CARRY4, check if the COUT line (CO[3])
+        # is in use.
+        if top.has_sink_from_source(site, 'COUT'):
+            co_in_use |= 1 << 3
 
-            if site.has_feature('{}OUTMUX.CY'.format(lut)):
-                co_in_use[idx] = True
+        # Any stage in use requires all of the stages below it, so fill in
+        # every bit below the highest bit in use.
+        in_use = co_in_use | o_in_use
+        in_use |= in_use >> 1
+        in_use |= in_use >> 2
 
-        # No outputs in the SLICE use CARRY4, check if the COUT line is in use.
-        for sink in top.find_sinks_from_source(site, 'COUT'):
-            co_in_use[idx] = True
-            break
-
-        for idx in [3, 2, 1, 0]:
-            if co_in_use[idx] or o_in_use[idx]:
-                for odx in range(idx):
-                    co_in_use[odx] = True
-                    o_in_use[odx] = True
-
-                break
-
-        if not any(co_in_use) and not any(o_in_use):
+        if not in_use:
             # No outputs in use, remove entire BEL
             top.remove_bel(site, carry4)
         else:
             pass
             """
             for idx in range(4):
-                if not o_in_use[idx] and not co_in_use[idx]:
+                if not in_use & (1 << idx):
                     sink_wire_pkey = site.remove_internal_sink(
                         carry4, 'S[{}]'.format(idx)
                     )
@@ -501,34 +735,34 @@ def cleanup_srl(top, site):
     """
 
     # Remove unused SRL16
-    for i, row in enumerate("ABCD"):
+    for row in "ABCD":
+        srl6_name, srl5_name, srl32_name = _SRL_BEL_NAMES[row]
 
-        srl6 = site.maybe_get_bel("{}6SRL".format(row))
-        srl5 = site.maybe_get_bel("{}5SRL".format(row))
+        srl6 = site.maybe_get_bel(srl6_name)
+        srl5 = site.maybe_get_bel(srl5_name)
 
-        if srl6 is not None or srl5 is not None:
-            # Mask A1 and A6 BEL pin and attached site pin.
-            if srl6 is not None:
-                site.mask_sink(srl6, 'dummyA1')
-                site.mask_sink(srl6, 'A6')
+        # Mask A1 and A6 BEL pin and attached site pin, and remove the BEL
+        # pin mappings.
+        if srl6 is not None:
+            site.mask_sink(srl6, 'dummyA1')
+            site.mask_sink(srl6, 'A6')
+
+            srl6.unmap_bel_pin(srl6.bel, 'A1')
+            srl6.unmap_bel_pin(srl6.bel, 'A6')
 
-                if srl5 is not None:
-                    del srl5.connections['dummyA1']
-                    del srl5.connections['A6']
+        if srl5 is not None:
+            if srl6 is not None:
+                # Site pins were already masked via srl6.
+                del srl5.connections['dummyA1']
+                del srl5.connections['A6']
             else:
                 site.mask_sink(srl5, 'dummyA1')
                 site.mask_sink(srl5, 'A6')
 
-            # Remove BEL pin mappings.
-            if srl6 is not None:
-                srl6.unmap_bel_pin(srl6.bel, 'A1')
-                srl6.unmap_bel_pin(srl6.bel, 'A6')
-
-            if srl5 is not None:
-                srl5.unmap_bel_pin(srl5.bel, 'A1')
-                srl5.unmap_bel_pin(srl5.bel, 'A6')
+            srl5.unmap_bel_pin(srl5.bel, 'A1')
+            srl5.unmap_bel_pin(srl5.bel, 'A6')
 
-        srl = site.maybe_get_bel("{}6SRL_32".format(row))
+        srl = site.maybe_get_bel(srl32_name)
         if srl is not None:
             site.mask_sink(srl, 'A1')
             srl.unmap_bel_pin(srl.bel, 'A1')
@@ -540,12 +774,18 @@ def cleanup_dram(top, site):
     Depending on the DRAM mode, the fake sinks are masked so that they
     are not present in the verilog output.
     """
+    # DRAM BELs are only emitted when the D LUT is in RAM mode, see
+    # process_slice.
+    if not site.has_feature('DLUT.RAM'):
+        return
+
     lut_modes = decode_dram(site)
+    modes = set(lut_modes.values())
 
-    if 'RAM32X1D' in lut_modes.values():
+    if 'RAM32X1D' in modes:
         for lut in 'BD':
             if lut_modes[lut] == 'RAM32X1D':
-                minus_one = chr(ord(lut) - 1)
+                minus_one = _PREV_LUT[lut]
 
                 ram32_0 = site.maybe_get_bel('RAM32X1D_{}_0'.format(lut))
                 ram32_1 = site.maybe_get_bel('RAM32X1D_{}_1'.format(lut))
@@ -585,7 +825,7 @@ def cleanup_dram(top, site):
 
                     ram32.remap_bel_pin_to_cell_pin(bel_name, bel_pin, "D")
 
-    if 'RAM128X1D' in lut_modes.values():
+    if 'RAM128X1D' in modes:
         ram128 = site.maybe_get_bel('RAM128X1D')
         for idx in range(6):
             site.mask_sink(ram128, 'ADDR_C[{}]'.format(idx))
@@ -596,7 +836,7 @@ def cleanup_dram(top, site):
             ram128.remap_bel_pin_to_cell_pin('A6LUT', 'A{}'.format(idx + 1),
                                              'DPRA[{}]'.format(idx))
 
-    if 'RAM128X1S' in lut_modes.values():
+    if 'RAM128X1S' in modes:
         if lut_modes['D'] == 'RAM128X1S' and lut_modes['C'] == 'RAM128X1S':
             ram128 = site.maybe_get_bel('RAM128X1S_CD')
             for idx in range(6):
@@ -612,7 +852,7 @@ def cleanup_dram(top, site):
                     ram128.remap_bel_pin_to_cell_pin(
                         'A6LUT', 'A{}'.format(idx + 1), 'A{}'.format(idx))
 
-    if 'RAM256X1S' in lut_modes.values():
+    if 'RAM256X1S' in modes:
         ram256 = site.maybe_get_bel('RAM256X1S')
 
         site.mask_sink(ram256, 'AX')
@@ -682,97 +922,53 @@ def munge_ram32m_init(init):
 
     """
 
-    bits = init.replace("64'b", "")[::-1]
-    assert len(bits) == 64
-
-    out_init = ['0' for _ in range(64)]
-    out_init[::2] = bits[:32]
-    out_init[1::2] = bits[32:]
-
-    return make_hex_verilog_value(64, int(''.join(out_init[::-1]), 2))
+    assert init >> 64 == 0
+
+    out_init = spread_even_bits(init) | (spread_even_bits(init >> 32) << 1)
+
+    return make_hex_verilog_value(64, out_init)
+
+
+# DI1 mux rules per LUT.  Each entry is a tuple of (feature, site wire,
+# site pips) rules to try in order, followed by the site pips used for the
+# "DI" fallback.
+_DI_RULES = {
+    'A': (
+        (
+            ('ALUT.DI1MUX.AI', 'AI', [('site_pip', 'ADI1MUX', 'AI')]),
+            ('BLUT.DI1MUX.BI', 'BI', [
+                ('site_pip', 'BDI1MUX', 'BI'),
+                ('site_pip', 'ADI1MUX', 'BDI1'),
+            ]),
+        ),
+        [
+            ('site_pip', 'BDI1MUX', 'DI'),
+            ('site_pip', 'ADI1MUX', 'BDI1'),
+        ],
+    ),
+    'B': (
+        (('BLUT.DI1MUX.BI', 'BI', [('site_pip', 'BDI1MUX', 'BI')]), ),
+        [('site_pip', 'BDI1MUX', 'DI')],
+    ),
+    'C': (
+        (('CLUT.DI1MUX.CI', 'CI', [('site_pip', 'CDI1MUX', 'CI')]), ),
+        [('site_pip', 'CDI1MUX', 'DI')],
+    ),
+    'D': ((), []),
+}
 
 
 def di_mux(site, bel, di_port, lut, bel_name):
     """ Implements DI1 mux. """
+    rules, di_site_pips = _DI_RULES[lut]
 
-    if lut == 'A':
-        if site.has_feature('ALUT.DI1MUX.AI'):
-            site.add_sink(
-                bel,
-                di_port,
-                "AI",
-                bel_name,
-                "DI1",
-                site_pips=[('site_pip', 'ADI1MUX', 'AI')])
-        else:
-            if site.has_feature('BLUT.DI1MUX.BI'):
-                site.add_sink(
-                    bel,
-                    di_port,
-                    "BI",
-                    bel_name,
-                    "DI1",
-                    site_pips=[
-                        ('site_pip', 'BDI1MUX', 'BI'),
-                        ('site_pip', 'ADI1MUX', 'BDI1'),
-                    ])
-            else:
-                site.add_sink(
-                    bel,
-                    di_port,
-                    "DI",
-                    bel_name,
-                    "DI1",
-                    site_pips=[
-                        ('site_pip', 'BDI1MUX', 'DI'),
-                        ('site_pip', 'ADI1MUX', 'BDI1'),
-                    ])
-    elif lut == 'B':
-        if site.has_feature('BLUT.DI1MUX.BI'):
-            site.add_sink(
-                bel,
-                di_port,
-                "BI",
-                bel_name,
-                "DI1",
-                site_pips=[
-                    ('site_pip', 'BDI1MUX', 'BI'),
-                ])
-        else:
+    for feature, wire, site_pips in rules:
+        if site.has_feature(feature):
             site.add_sink(
-                bel,
-                di_port,
-                "DI",
-                bel_name,
-                "DI1",
-                site_pips=[
-                    ('site_pip', 'BDI1MUX', 'DI'),
-                ])
-    elif lut == 'C':
-        if site.has_feature('CLUT.DI1MUX.CI'):
-            site.add_sink(
-                bel,
-                di_port,
-                "CI",
-                bel_name,
-                "DI1",
-                site_pips=[
-                    ('site_pip', 'CDI1MUX', 'CI'),
-                ])
-        else:
-            site.add_sink(
-                bel,
-                di_port,
-                "DI",
-                bel_name,
-                "DI1",
-                site_pips=[
-                    ('site_pip', 'CDI1MUX', 'DI'),
-                ])
-    elif lut == 'D':
-        site.add_sink(bel, di_port, "DI", bel_name, "DI1")
-    else:
-        assert False, lut
+                bel, di_port, wire, bel_name, "DI1", site_pips=site_pips)
+            return
+
+    site.add_sink(bel, di_port, "DI", bel_name, "DI1", site_pips=di_site_pips)
 
 
 def create_ramd32(bel_name, cell_name):
@@ -963,9 +1159,24 @@ def process_slice(top, s):
 
     site_obj = get_clb_site(top.db, top.grid, tile=aparts[0], site=aparts[1])
     site = Site(s, site_obj)
+    features = site.features
+
+    IS_C_INVERTED = int(site.has_feature('CLKINV'))
+    if IS_C_INVERTED:
+        clk_site_pips = [('site_pip', 'CLKINV', 'CLK_B')]
+    else:
+        clk_site_pips = [('site_pip', 'CLKINV', 'CLK')]
+
+    # CE, SR and CLK are shared by every FF in the site, so resolve their
+    # routing once.
+    ce_used = 'CEUSEDMUX' in features
+    sr_used = 'SRUSEDMUX' in features
+
+    def connect_ff(bel, name, clk, ce, sr, init):
+        """ Connects the CLK/CE/SR pins and sets the parameters of a FF. """
+        site.add_sink(bel, clk, "CLK", bel.bel, 'CK', site_pips=clk_site_pips)
 
-    def connect_ce_sr(bel, ce, sr):
-        if site.has_feature('CEUSEDMUX'):
+        if ce_used:
             site.add_sink(bel, ce, 'CE', bel.bel, 'CE',
                           [('site_pip', 'CEUSEDMUX', 'IN')])
         else:
@@ -981,7 +1192,7 @@ def process_slice(top, s):
                     ('site_pip', 'CEUSEDMUX', '1'),
                 ])
 
-        if site.has_feature('SRUSEDMUX'):
+        if sr_used:
             site.add_sink(bel, sr, 'SR', bel.bel, 'SR',
                           [('site_pip', 'SRUSEDMUX', 'IN')])
         else:
@@ -997,11 +1208,12 @@ def process_slice(top, s):
                     ('site_pip', 'SRUSEDMUX', '0'),
                 ])
 
-    IS_C_INVERTED = int(site.has_feature('CLKINV'))
-    if IS_C_INVERTED:
-        clk_site_pips = [('site_pip', 'CLKINV', 'CLK_B')]
-    else:
-        clk_site_pips = [('site_pip', 'CLKINV', 'CLK')]
+        bel.parameters['INIT'] = init
+
+        if name in ['LDCE', 'LDPE']:
+            bel.parameters['IS_G_INVERTED'] = int(not IS_C_INVERTED)
+        else:
+            bel.parameters['IS_C_INVERTED'] = IS_C_INVERTED
 
     if mlut:
         if site.has_feature('WEMUX.CE'):
@@ -1011,93 +1223,86 @@ def process_slice(top, s):
             WE = 'WE'
             we_site_pips = [('site_pip', 'WEMUX', 'WE')]
 
-    if site.has_feature('DLUT.RAM'):
+    if 'DLUT.RAM' in features:
         # Must be a SLICEM to have RAM set.
         assert mlut
     else:
         for row in 'ABC':
-            assert not site.has_feature('{}LUT.RAM'.format(row))
+            assert _LUT_RAM[row] not in features
 
     muxes = set(('F7AMUX', 'F7BMUX', 'F8MUX'))
 
     luts = {}
-    any_srls = False
-    for row in 'ABCD':
-        if site.has_feature('{}LUT.SRL'.format(row)):
-            any_srls = True
-            break
+    any_srls = not _LUT_SRL_FEATURES.isdisjoint(features)
 
     # Add BELs for LUTs/RAMs
-    if not site.has_feature('DLUT.RAM'):
+    if 'DLUT.RAM' not in features and not any_srls:
+        # Most common case, no SRLs and no DRAM, just plain LUTs.
+        for row in 'DCBA':
+            luts[row] = create_lut(site, row)
+    elif 'DLUT.RAM' not in features:
         chain_features = (None, 'CLUT.DI1MUX.DI_DMC31', 'BLUT.DI1MUX.DI_CMC31',
                           'ALUT.DI1MUX.BDI1_BMC31', None)
         chain_feature_values = []
         for feat in chain_features:
             if feat is not None:
-                chain_feature_values.append(site.has_feature(feat))
+                chain_feature_values.append(feat in features)
             else:
                 chain_feature_values.append(None)
 
         for row, up_chain, down_chain in zip('DCBA', chain_feature_values[:4],
                                              chain_feature_values[1:]):
             # SRL
-            if site.has_feature('{}LUT.SRL'.format(row)):
+            if _LUT_SRL[row] in features:
                 # Cannot have both SRL and DRAM
-                assert not site.has_feature('{}LUT.RAM'.format(row))
+                assert _LUT_RAM[row] not in features
+
+                srl6_name, srl5_name, srl32_name = _SRL_BEL_NAMES[row]
+                mc31_wire = '{}MC31'.format(row)
+
+                # The A row MC31 output can also be used by the DMUX output
+                # or the D FF.
+                if row == 'A' and ('DOUTMUX.MC31' in features
+                                   or 'DFFMUX.MC31' in features):
+                    down_chain = True
 
                 # SRL32
-                if not site.has_feature('{}LUT.SMALL'.format(row)):
+                if _LUT_SMALL[row] not in features:
                     srl = create_srl32(site, row, up_chain)
                     srl.parameters['INIT'] = get_srl32_init(site, row)
 
                     site.add_sink(
                         srl, 'CE', WE, srl.bel, 'WE', site_pips=we_site_pips)
 
-                    if row == 'A' and site.has_feature('DOUTMUX.MC31'):
-                        down_chain = True
-
-                    if row == 'A' and site.has_feature('DFFMUX.MC31'):
-                        down_chain = True
-
                     if down_chain:
-                        site.add_internal_source(
-                            srl, 'Q31', '{}MC31'.format(row), srl.bel, 'MC31')
+                        site.add_internal_source(srl, 'Q31', mc31_wire,
+                                                 srl.bel, 'MC31')
                     else:
                         srl.add_unconnected_port(
                             'Q31', None, direction="output")
 
-                    site.add_bel(srl, name='{}6SRL_32'.format(row))
+                    site.add_bel(srl, name=srl32_name)
 
                 # 2x SRL16
                 else:
                     init = get_srl16_init(site, row)
 
-                    for i, part in enumerate(['5', '6']):
+                    for i, part, srl_name in ((0, '5', srl5_name),
+                                              (1, '6', srl6_name)):
                         if part == '5' and up_chain:
                             # Check if SRL in previous row exists.  If it
                             # doesn't exist, this SRL is impossible and should
                             # not be emitted.
-                            row_plus_1 = chr(ord(row) + 1)
+                            row_plus_1 = _NEXT_LUT[row]
                             up_srl = site.maybe_get_bel(
-                                '{}6SRL'.format(row_plus_1))
+                                _SRL_BEL_NAMES[row_plus_1][0])
                             if not up_srl:
                                 continue
 
-                        # Determine whether to use SRL16E or SRLC16E
-                        srl_type = 'SRL16E'
-                        use_mc31 = False
-
-                        if part == '6':
-                            if row == 'A' and site.has_feature('DOUTMUX.MC31'):
-                                srl_type = 'SRLC16E'
-                                use_mc31 = True
-                            if row == 'A' and site.has_feature('DFFMUX.MC31'):
-                                srl_type = 'SRLC16E'
-                                use_mc31 = True
-
-                            if down_chain:
-                                srl_type = 'SRLC16E'
-                                use_mc31 = True
+                        # Determine whether to use SRL16E or SRLC16E, only
+                        # the SRL16 in the 6LUT can drive MC31.
+                        use_mc31 = part == '6' and bool(down_chain)
+                        srl_type = 'SRLC16E' if use_mc31 else 'SRL16E'
 
                         # Create the SRL
                         srl = create_srl16(site, row, srl_type, part, up_chain
@@ -1113,18 +1318,17 @@ def process_slice(top, s):
                             site_pips=we_site_pips)
 
                         if use_mc31:
-                            site.add_internal_source(srl, 'Q15',
-                                                     '{}MC31'.format(row),
+                            site.add_internal_source(srl, 'Q15', mc31_wire,
                                                      srl.bel, 'MC31')
 
-                        site.add_bel(srl, name="{}{}SRL".format(row, part))
+                        site.add_bel(srl, name=srl_name)
 
             # LUT
             else:
                 luts[row] = create_lut(site, row)
     else:
         # DRAM is active.  Determine what BELs are in use.
-        lut_modes = decode_dram(site)
+        lut_modes = dict(decode_dram(site))
 
         if lut_modes['D'] == 'RAM256X1S':
             ram256 = Bel('RAM256X1S', priority=3)
@@ -1143,20 +1347,7 @@ def process_slice(top, s):
                     ('site_pip', 'ADI1MUX', 'BDI1'),
                 ])
 
-            for idx in range(6):
-                site.add_sink(ram256, 'A[{}]'.format(idx),
-                              "D{}".format(idx + 1), "D6LUT",
-                              "A{}".format(idx + 1))
-                # Add fake sinks as they need to be routed to
-                site.add_sink(ram256, 'ADDR_C[{}]'.format(idx),
-                              "C{}".format(idx + 1), "C6LUT",
-                              "A{}".format(idx + 1))
-                site.add_sink(ram256, 'ADDR_B[{}]'.format(idx),
-                              "B{}".format(idx + 1), "B6LUT",
-                              "A{}".format(idx + 1))
-                site.add_sink(ram256, 'ADDR_A[{}]'.format(idx),
-                              "A{}".format(idx + 1), "A6LUT",
-                              "A{}".format(idx + 1))
+            site.add_sinks(ram256, _RAM256X1S_ADDR_SINKS)
 
             site.add_sink(ram256, 'A[6]', "CX", "F7BMUX", "S0")
             site.add_sink(ram256, 'A[7]', "BX", "F8MUX", "S0")
@@ -1204,13 +1395,7 @@ def process_slice(top, s):
                 site_pips=clk_site_pips)
             di_mux(site, ram128, 'D', 'C', 'C6LUT')
 
-            for idx in range(6):
-                site.add_sink(ram128, 'A{}'.format(idx), "D{}".format(idx + 1),
-                              'D6LUT', 'A{}'.format(idx + 1))
-                # Add fake sink to route through the C[N] pins
-                site.add_sink(ram128, 'ADDR_C{}'.format(idx),
-                              "C{}".format(idx + 1), 'C6LUT',
-                              'A{}'.format(idx + 1))
+            site.add_sinks(ram128, _RAM128X1S_CD_ADDR_SINKS)
 
             site.add_sink(ram128, 'A6', "CX", 'F7BMUX', 'S0')
             site.link_site_routing([('bel_pin', 'CX', 'CX', 'site_source'),
@@ -1248,14 +1433,7 @@ def process_slice(top, s):
 
                 di_mux(site, ram128, 'D', 'A', 'A6LUT')
 
-                for idx in range(6):
-                    site.add_sink(ram128, 'A{}'.format(idx),
-                                  "B{}".format(idx + 1), 'B6LUT',
-                                  'A{}'.format(idx + 1))
-                    # Add fake sink to route through the A[N] pins
-                    site.add_sink(ram128, 'ADDR_A{}'.format(idx),
-                                  "A{}".format(idx + 1), 'A6LUT',
-                                  'A{}'.format(idx + 1))
+                site.add_sinks(ram128, _RAM128X1S_AB_ADDR_SINKS)
 
                 site.add_sink(ram128, 'A6', "AX", 'F7AMUX', 'S0')
 
@@ -1302,29 +1480,7 @@ def process_slice(top, s):
                 ('bel_pin', 'C6LUT', 'DI1', 'input'),
             ])
 
-            for idx in range(6):
-                site.add_sink(ram128, 'A[{}]'.format(idx),
-                              "D{}".format(idx + 1), "D6LUT",
-                              "A{}".format(idx + 1))
-                # Add fake sink to route through the C[N] pins
-                site.add_sink(
-                    ram128,
-                    'ADDR_C[{}]'.format(idx),
-                    "C{}".format(idx + 1),
-                    "C6LUT",
-                    "A{}".format(idx + 1),
-                    real_cell_pin='A[{}]'.format(idx))
-                site.add_sink(ram128, 'DPRA[{}]'.format(idx),
-                              "B{}".format(idx + 1), "B6LUT",
-                              "A{}".format(idx + 1))
-                # Add fake sink to route through the A[N] pins
-                site.add_sink(
-                    ram128,
-                    'DATA_A[{}]'.format(idx),
-                    "A{}".format(idx + 1),
-                    "A6LUT",
-                    "A{}".format(idx + 1),
-                    real_cell_pin='DPRA[{}]'.format(idx))
+            site.add_sinks(ram128, _RAM128X1D_ADDR_SINKS)
 
             site.add_sink(ram128, 'A[6]', "CX", "F7BMUX", "S0")
             site.link_site_routing([('bel_pin', 'CX', 'CX', 'site_source'),
@@ -1400,10 +1556,7 @@ def process_slice(top, s):
                 site.add_internal_source(ram64m, 'DO' + lut, lut + "O6",
                                          bel_name, "O6")
 
-                for idx in range(6):
-                    site.add_sink(
-                        ram64m, 'ADDR{}[{}]'.format(lut, idx), "{}{}".format(
-                            lut, idx + 1), bel_name, "A{}".format(idx + 1))
+                site.add_sinks(ram64m, _RAMXM_ADDR_SINKS[lut])
 
                 ram64m.add_physical_bel(phys_bel)
                 ram64m.physical_net_names[bel_name, 'O6'] = 'DO' + lut
@@ -1437,10 +1590,7 @@ def process_slice(top, s):
                                          lut + "O5", '{}5LUT'.format(lut),
                                          "O5")
 
-                for idx in range(6):
-                    site.add_sink(
-                        ram32m, 'ADDR{}[{}]'.format(lut, idx), "{}{}".format(
-                            lut, idx + 1), bel_name, "A{}".format(idx + 1))
+                site.add_sinks(ram32m, _RAMXM_ADDR_SINKS[lut])
 
                 ram32m.parameters['INIT_' + lut] = munge_ram32m_init(
                     get_lut_init(site, lut))
@@ -1471,7 +1621,7 @@ def process_slice(top, s):
             if lut not in lut_modes:
                 continue
 
-            minus_one = chr(ord(lut) - 1)
+            minus_one = _PREV_LUT[lut]
 
             if lut_modes[lut] == 'RAM64X1D':
                 assert lut_modes[minus_one] == lut_modes[lut]
@@ -1505,11 +1655,7 @@ def process_slice(top, s):
                 ram64.physical_net_names[upper_lut, 'O6'] = 'SPO'
                 ram64.physical_net_names[lower_lut, 'O6'] = 'DPO'
 
-                for idx in range(6):
-                    site.add_sink(ram64, 'A{}'.format(idx), "{}{}".format(
-                        lut, idx + 1), upper_lut, "A{}".format(idx + 1))
-                    site.add_sink(ram64, 'DPRA{}'.format(idx), "{}{}".format(
-                        minus_one, idx + 1), lower_lut, "A{}".format(idx + 1))
+                site.add_sinks(ram64, _RAM64X1D_ADDR_SINKS[lut])
 
                 site.add_internal_source(ram64, 'SPO', lut + "O6", upper_lut,
                                          "O6")
@@ -1553,13 +1699,8 @@ def process_slice(top, s):
                         bel_name,
                         'CLK',
                         site_pips=clk_site_pips)
-                    for aidx in range(6):
-                        site.add_sink(ram32[idx], 'A{}'.format(aidx),
-                                      "{}{}".format(lut, aidx + 1), bel_name,
-                                      'A{}'.format(aidx + 1))
-                        site.add_sink(ram32[idx], 'DPRA{}'.format(aidx),
-                                      "{}{}".format(minus_one, aidx + 1),
-                                      minus_bel_name, 'A{}'.format(aidx + 1))
+                    site.add_sinks(ram32[idx],
+                                   _RAM32X1D_ADDR_SINKS[lut, sub_bel])
 
                     ram32[idx].add_physical_bel(create_ramd32(bel_name, 'SP'))
                     ram32[idx].add_physical_bel(
@@ -1596,12 +1737,10 @@ def process_slice(top, s):
                 other_init = get_lut_init(site, minus_one)
                 assert lut_init == other_init
 
-                bits = lut_init.replace("64'b", "")
-                assert len(bits) == 64
                 ram32[0].parameters['INIT'] = make_hex_verilog_value(
-                    32, int(bits[:32], 2))
+                    32, lut_init >> 32)
                 ram32[1].parameters['INIT'] = make_hex_verilog_value(
-                    32, int(bits[32:], 2))
+                    32, lut_init & 0xFFFFFFFF)
 
                 site.add_bel(ram32[0], name=ram32[0].name)
                 site.add_bel(ram32[1], name=ram32[1].name)
@@ -1632,9 +1771,7 @@ def process_slice(top, s):
                     site_pips=clk_site_pips)
                 di_mux(site, ram64, 'D', lut, ram64.bel)
 
-                for idx in range(6):
-                    site.add_sink(ram64, 'A{}'.format(idx), "{}{}".format(
-                        lut, idx + 1), ram64.bel, "A{}".format(idx + 1))
+                site.add_sinks(ram64, _RAM64X1S_ADDR_SINKS[lut])
 
                 site.add_internal_source(ram64, 'O', lut + "O6", ram64.bel,
                                          "O6")
@@ -1655,14 +1792,12 @@ def process_slice(top, s):
                 ram32[0].set_bel('{}6LUT'.format(lut))
                 ram32[1].set_bel('{}5LUT'.format(lut))
 
-                for idx in range(2):
+                for idx, sub_bel in enumerate('65'):
                     site.add_sink(ram32[idx], 'WE', WE, ram32[idx].bel, 'WE')
                     site.add_sink(ram32[idx], 'WCLK', "CLK", ram32[idx].bel,
                                   'CLK')
-                    for aidx in range(5):
-                        site.add_sink(ram32[idx], 'A{}'.format(aidx),
-                                      "{}{}".format(lut, aidx + 1),
-                                      ram32[idx].bel, 'A{}'.format(aidx + 1))
+                    site.add_sinks(ram32[idx],
+                                   _RAM32X1S_ADDR_SINKS[lut, sub_bel])
 
                 site.add_sink(ram32[0], 'D', lut + "X", ram32[0].bel, 'DI2')
                 site.add_internal_source(ram32[0], 'O', lut + "O6",
@@ -1674,12 +1809,10 @@ def process_slice(top, s):
 
                 lut_init = get_lut_init(site, lut)
 
-                bits = lut_init.replace("64'b", "")
-                assert len(bits) == 64
                 ram32[0].parameters['INIT'] = make_hex_verilog_value(
-                    32, int(bits[:32], 2))
+                    32, lut_init >> 32)
                 ram32[1].parameters['INIT'] = make_hex_verilog_value(
-                    32, int(bits[32:], 2))
+                    32, lut_init & 0xFFFFFFFF)
 
                 site.add_bel(ram32[0])
                 site.add_bel(ram32[1])
@@ -1694,62 +1827,43 @@ def process_slice(top, s):
         need_f7a = True
         need_f7b = True
 
-    for mux in sorted(muxes):
-        if mux == 'F7AMUX':
-            if not need_f8 and not need_f7a:
-                continue
-            else:
-                bel_type = 'MUXF7'
-                opin = 'O'
+    # Emit the free wide muxes that are in use, in F7AMUX, F7BMUX, F8MUX
+    # order.
+    if need_f7a and 'F7AMUX' in muxes:
+        f7amux = Bel('MUXF7', 'MUXF7A', priority=7)
+        f7amux.set_bel('F7AMUX')
 
-            f7amux = Bel(bel_type, 'MUXF7A', priority=7)
-            f7amux.set_bel('F7AMUX')
+        site.connect_internal(f7amux, 'I0', 'BO6', f7amux.bel, '0')
+        site.connect_internal(f7amux, 'I1', 'AO6', f7amux.bel, '1')
+        site.add_sink(f7amux, 'S', 'AX', f7amux.bel, 'S0')
 
-            site.connect_internal(f7amux, 'I0', 'BO6', f7amux.bel, '0')
-            site.connect_internal(f7amux, 'I1', 'AO6', f7amux.bel, '1')
-            site.add_sink(f7amux, 'S', 'AX', f7amux.bel, 'S0')
+        site.add_internal_source(f7amux, 'O', 'F7AMUX_O', f7amux.bel, 'OUT')
 
-            site.add_internal_source(f7amux, opin, 'F7AMUX_O', f7amux.bel,
-                                     'OUT')
-
-            site.add_bel(f7amux)
-        elif mux == 'F7BMUX':
-            if not need_f8 and not need_f7b:
-                continue
-            else:
-                bel_type = 'MUXF7'
-                opin = 'O'
+        site.add_bel(f7amux)
 
-            f7bmux = Bel(bel_type, 'MUXF7B', priority=7)
-            f7bmux.set_bel('F7BMUX')
+    if need_f7b and 'F7BMUX' in muxes:
+        f7bmux = Bel('MUXF7', 'MUXF7B', priority=7)
+        f7bmux.set_bel('F7BMUX')
 
-            site.connect_internal(f7bmux, 'I0', 'DO6', f7bmux.bel, '0')
-            site.connect_internal(f7bmux, 'I1', 'CO6', f7bmux.bel, '1')
-            site.add_sink(f7bmux, 'S', 'CX', f7bmux.bel, 'S0')
+        site.connect_internal(f7bmux, 'I0', 'DO6', f7bmux.bel, '0')
+        site.connect_internal(f7bmux, 'I1', 'CO6', f7bmux.bel, '1')
+        site.add_sink(f7bmux, 'S', 'CX', f7bmux.bel, 'S0')
 
-            site.add_internal_source(f7bmux, opin, 'F7BMUX_O', f7bmux.bel,
-                                     'OUT')
+        site.add_internal_source(f7bmux, 'O', 'F7BMUX_O', f7bmux.bel, 'OUT')
 
-            site.add_bel(f7bmux)
-        elif mux == 'F8MUX':
-            if not need_f8:
-                continue
-            else:
-                bel_type = 'MUXF8'
-                opin = 'O'
+        site.add_bel(f7bmux)
 
-            f8mux = Bel(bel_type, priority=7)
-            f8mux.set_bel('F8MUX')
+    if need_f8 and 'F8MUX' in muxes:
+        f8mux = Bel('MUXF8', priority=7)
+        f8mux.set_bel('F8MUX')
 
-            site.connect_internal(f8mux, 'I0', 'F7BMUX_O', f8mux.bel, '0')
-            site.connect_internal(f8mux, 'I1', 'F7AMUX_O', f8mux.bel, '1')
-            site.add_sink(f8mux, 'S', 'BX', f8mux.bel, 'S0')
+        site.connect_internal(f8mux, 'I0', 'F7BMUX_O', f8mux.bel, '0')
+        site.connect_internal(f8mux, 'I1', 'F7AMUX_O', f8mux.bel, '1')
+        site.add_sink(f8mux, 'S', 'BX', f8mux.bel, 'S0')
 
-            site.add_internal_source(f8mux, opin, 'F8MUX_O', f8mux.bel, 'OUT')
+        site.add_internal_source(f8mux, 'O', 'F8MUX_O', f8mux.bel, 'OUT')
 
-            site.add_bel(f8mux)
-        else:
-            assert False, mux
+        site.add_bel(f8mux)
 
     can_have_carry4 = True
     for lut in 'ABCD':
@@ -1764,8 +1878,7 @@ def process_slice(top, s):
         bel = Bel('CARRY4', priority=1)
         bel.set_bel('CARRY4')
 
-        for idx in range(4):
-            lut = chr(ord('A') + idx)
+        for idx, lut in enumerate('ABCD'):
             if site.has_feature('CARRY4.{}CY0'.format(lut)):
                 source = lut + 'O5'
                 site.connect_internal(
@@ -1879,126 +1992,38 @@ def process_slice(top, s):
                     site_pips=[('site_pip', '{}5FFMUX'.format(lut), 'IN_B')],
                 )
 
-            site.add_sink(
-                ff5, clk, "CLK", ff5.bel, 'CK', site_pips=clk_site_pips)
-
-            connect_ce_sr(ff5, ce, sr)
-
+            connect_ff(ff5, name, clk, ce, sr, init)
             site.add_internal_source(ff5, 'Q', lut + '5Q', ff5.bel, 'Q')
-            ff5.parameters['INIT'] = init
-
-            if name in ['LDCE', 'LDPE']:
-                ff5.parameters['IS_G_INVERTED'] = int(not IS_C_INVERTED)
-            else:
-                ff5.parameters['IS_C_INVERTED'] = IS_C_INVERTED
-
             site.add_bel(ff5)
 
     for lut in 'ABCD':
+        for feature, source, site_pips, needs_carry4 in _FFMUX_RULES[lut]:
+            if feature in features:
+                break
+        else:
+            continue
+
         name, clk, ce, sr, init = ff_bel(site, lut, ff5=False)
         ff = Bel(name, "{}_{}".format(lut, name))
         ff.set_bel(lut + 'FF')
 
-        if site.has_feature('{}FFMUX.{}X'.format(lut, lut)):
-            site.add_sink(
-                ff,
-                'D',
-                lut + 'X',
-                ff.bel,
-                'D',
-                site_pips=[('site_pip', '{}FFMUX'.format(lut),
-                            '{}X'.format(lut))])
-
-        elif lut == 'A' and site.has_feature('AFFMUX.F7'):
-            site.connect_internal(
-                ff,
-                'D',
-                'F7AMUX_O',
-                ff.bel,
-                'D',
-                site_pips=[('site_pip', 'AFFMUX', 'F7')])
-
-        elif lut == 'C' and site.has_feature('CFFMUX.F7'):
-            site.connect_internal(
-                ff,
-                'D',
-                'F7BMUX_O',
-                ff.bel,
-                'D',
-                site_pips=[('site_pip', 'CFFMUX', 'F7')])
-
-        elif lut == 'B' and site.has_feature('BFFMUX.F8'):
-            site.connect_internal(
-                ff,
-                'D',
-                'F8MUX_O',
-                ff.bel,
-                'D',
-                site_pips=[('site_pip', 'BFFMUX', 'F8')])
-
-        elif lut == 'D' and site.has_feature('DFFMUX.MC31'):
-            site.connect_internal(
-                ff,
-                'D',
-                'AMC31',
-                ff.bel,
-                'D',
-                site_pips=[('site_pip', 'DFFMUX', 'MC31')])
-
-        elif site.has_feature('{}FFMUX.O5'.format(lut)):
-            site.connect_internal(
-                ff,
-                'D',
-                lut + 'O5',
-                ff.bel,
-                'D',
-                site_pips=[('site_pip', '{}FFMUX'.format(lut), 'O5')])
-
-        elif site.has_feature('{}FFMUX.O6'.format(lut)):
-            site.connect_internal(
-                ff,
-                'D',
-                lut + 'O6',
-                ff.bel,
-                'D',
-                site_pips=[('site_pip', '{}FFMUX'.format(lut), 'O6')])
-
-        elif site.has_feature('{}FFMUX.CY'.format(lut)):
+        if needs_carry4:
             assert can_have_carry4
-            site.connect_internal(
-                ff,
-                'D',
-                lut + '_CY',
-                ff.bel,
-                'D',
-                site_pips=[('site_pip', '{}FFMUX'.format(lut), 'CY')])
 
-        elif site.has_feature('{}FFMUX.XOR'.format(lut)):
-            assert can_have_carry4
-            site.connect_internal(
-                ff,
-                'D',
-                lut + '_XOR',
-                ff.bel,
-                'D',
-                site_pips=[('site_pip', '{}FFMUX'.format(lut), 'XOR')])
+        if source is None:
+            site.add_sink(ff, 'D', lut + 'X', ff.bel, 'D', site_pips=site_pips)
         else:
-            continue
+            site.connect_internal(
+                ff, 'D', source, ff.bel, 'D', site_pips=site_pips)
 
         site.add_source(ff, 'Q', lut + 'Q', ff.bel, 'Q')
-        site.add_sink(ff, clk, "CLK", ff.bel, 'CK', site_pips=clk_site_pips)
-
-        connect_ce_sr(ff, ce, sr)
-
-        ff.parameters['INIT'] = init
-
-        if name in ['LDCE', 'LDPE']:
-            ff.parameters['IS_G_INVERTED'] = int(not IS_C_INVERTED)
-        else:
-            ff.parameters['IS_C_INVERTED'] = IS_C_INVERTED
-
+        connect_ff(ff, name, clk, ce, sr, init)
         site.add_bel(ff)
 
+    # Emit the dedicated O6 outputs while resolving the OUTMUX rules in the
+    # same pass.  The xMUX outputs are emitted afterwards, as xMUX.O6 refers
+    # to the O6 outputs.
+    mux_outputs = []
     for lut in 'ABCD':
         if lut + 'O6' in site.internal_sources:
             site.add_output_from_internal(
@@ -2006,59 +2031,22 @@ def process_slice(top, s):
                 lut + 'O6',
                 site_pips=[('site_pip', '{}USED'.format(lut), '0')])
 
-    for lut in 'ABCD':
-        output_wire = lut + 'MUX'
-        if site.has_feature('{}OUTMUX.{}5Q'.format(lut, lut)):
-            site.add_output_from_internal(
-                output_wire,
-                lut + '5Q',
-                site_pips=[('site_pip', '{}OUTMUX'.format(lut),
-                            '{}5Q'.format(lut))])
+        for feature, source, site_pips, needs_carry4 in _OUTMUX_RULES[lut]:
+            if feature in features:
+                if needs_carry4:
+                    assert can_have_carry4
 
-        elif lut == 'A' and site.has_feature('AOUTMUX.F7'):
-            site.add_output_from_internal(
-                output_wire,
-                'F7AMUX_O',
-                site_pips=[('site_pip', 'AOUTMUX', 'F7')])
-
-        elif lut == 'C' and site.has_feature('COUTMUX.F7'):
-            site.add_output_from_internal(
-                output_wire,
-                'F7BMUX_O',
-                site_pips=[('site_pip', 'COUTMUX', 'F7')])
-
-        elif lut == 'B' and site.has_feature('BOUTMUX.F8'):
-            site.add_output_from_internal(
-                output_wire,
-                'F8MUX_O',
-                site_pips=[('site_pip', 'BOUTMUX', 'F8')])
-
-        elif site.has_feature('{}OUTMUX.O5'.format(lut)):
-            site.add_output_from_internal(
-                output_wire,
-                lut + 'O5',
-                site_pips=[('site_pip', '{}OUTMUX'.format(lut), 'O5')])
+                mux_outputs.append((lut, lut + 'MUX', source, site_pips))
+                break
 
-        elif site.has_feature('{}OUTMUX.O6'.format(lut)):
+    for lut, output_wire, source, site_pips in mux_outputs:
+        if source is None:
             # Note: There is a dedicated O6 output.  Fixed routing requires
             # treating xMUX.O6 as a routing connection.
             site.add_output_from_output(output_wire, lut)
-
-        elif site.has_feature('{}OUTMUX.CY'.format(lut)):
-            assert can_have_carry4
-            site.add_output_from_internal(
-                output_wire,
-                lut + '_CY',
-                site_pips=[('site_pip', '{}OUTMUX'.format(lut), 'CY')])
-
-        elif site.has_feature('{}OUTMUX.XOR'.format(lut)):
-            assert can_have_carry4
-            site.add_output_from_internal(
-                output_wire,
-                lut + '_XOR',
-                site_pips=[('site_pip', '{}OUTMUX'.format(lut), 'XOR')])
         else:
-            continue
+            site.add_output_from_internal(
+                output_wire, source, site_pips=site_pips)
 
     if site.has_feature('DOUTMUX.MC31'):
         site.add_output_from_internal(
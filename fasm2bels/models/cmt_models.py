@@ -52,7 +52,6 @@ BANDWIDTH_LOOKUP = {
         0b1111110100: "OPTIMIZED",
         0b1111011100: "OPTIMIZED",
         0b1111101100: "OPTIMIZED",
-        0b1111110100: "OPTIMIZED",
         0b1111001100: "OPTIMIZED",
         0b1110010100: "OPTIMIZED",
         0b1111010100: "OPTIMIZED",
@@ -62,7 +61,6 @@ BANDWIDTH_LOOKUP = {
         0b0100001000: "OPTIMIZED",
         0b0010100000: "OPTIMIZED",
         0b0011010000: "OPTIMIZED",
-        0b0010100000: "OPTIMIZED",
         0b0100110000: "OPTIMIZED",
         0b0010010000: "OPTIMIZED",
     },
@@ -71,7 +69,6 @@ BANDWIDTH_LOOKUP = {
         # LOW
         0b0010000100: "LOW",
         0b0010001000: "LOW",
-        0b0010001000: "LOW",
         0b0010001100: "LOW",
         0b0010010100: "LOW",
         0b0010011000: "LOW",
@@ -90,7 +87,6 @@ BANDWIDTH_LOOKUP = {
         0b0010111100: "OPTIMIZED",
         0b0011010000: "OPTIMIZED",
         0b0011110000: "OPTIMIZED",
-        0b0011110000: "OPTIMIZED",
         0b0100101000: "OPTIMIZED",
         0b0100110000: "OPTIMIZED",
         0b0100111100: "OPTIMIZED",
@@ -113,6 +109,25 @@ BANDWIDTH_LOOKUP = {
 }
 
 
+def _build_bandwidth_table(lookup, width=10):
+    """ Flatten a TABLE register to BANDWIDTH map into a tuple indexed by the
+    TABLE value, with None for unknown values.
+
+    Values are stored as quoted Verilog string literals, ready to be used as
+    the BANDWIDTH parameter. """
+    table = [None] * (1 << width)
+    for value, bandwidth in lookup.items():
+        table[value] = '"{}"'.format(bandwidth)
+
+    return tuple(table)
+
+
+_BANDWIDTH_TABLE = {
+    bel_type: _build_bandwidth_table(lookup)
+    for bel_type, lookup in BANDWIDTH_LOOKUP.items()
+}
+
+
 def decode_mmcm_fractional_divider(frac, low_time, high_time, frac_wf_fall,
                                    frac_wf_rise):
     """
@@ -409,9 +424,9 @@ def process_pll_or_mmcm(top, site):
 
     # Bandwidth
     table = site.decode_multi_bit_feature('TABLE')
-    if table in BANDWIDTH_LOOKUP[bel_type]:
-        bel.parameters['BANDWIDTH'] =\
-            '"{}"'.format(BANDWIDTH_LOOKUP[bel_type][table])
+    bandwidth = _BANDWIDTH_TABLE[bel_type][table]
+    if bandwidth is not None:
+        bel.parameters['BANDWIDTH'] = bandwidth
 
     # MMCM compensation
     if is_mmcm:
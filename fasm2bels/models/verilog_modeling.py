@@ -291,6 +291,31 @@ class NoConnect(ConnectionModel):
 class Bel(object):
     """ Object to model a BEL. """
 
+    # Large designs create many Bel objects, so avoid a per-instance __dict__.
+    __slots__ = (
+        'module',
+        'name',
+        'connections',
+        'unused_connections',
+        'parameters',
+        'outputs',
+        'prefix',
+        'site',
+        'keep',
+        'bel',
+        'nets',
+        'net_names',
+        'priority',
+        'parent_cell',
+        'bel_pins_to_cell_pins',
+        'other_bels',
+        'physical_bels',
+        'physical_net_names',
+        'final_net_names',
+        'port_width',
+        'port_direction',
+    )
+
     def __init__(self, module, name=None, keep=True, priority=0):
         """ Construct Bel object.
 
@@ -739,6 +764,28 @@ class Site(object):
 
     """
 
+    # One Site is created per used site, so avoid a per-instance __dict__.
+    # Sites are used as weakref keys, so keep __weakref__.
+    __slots__ = (
+        'bels',
+        'sinks',
+        'sources',
+        'outputs',
+        'internal_sources',
+        'internal_source_bel_pins',
+        'set_features',
+        'features',
+        'post_route_cleanup',
+        'bel_map',
+        'site_wire_to_wire_pkey',
+        'site_type_pins',
+        'tile',
+        'site',
+        'site_type_override',
+        'site_routing',
+        '__weakref__',
+    )
+
     def __init__(self, features, site, tile=None, merged_site=False):
         self.bels = []
         self.sinks = {}
@@ -788,8 +835,9 @@ class Site(object):
                             value_format=f.value_format,
                         ))
 
-        # Features as strings
-        self.features = set([f.feature for f in self.set_features])
+        # Features as strings.  Features are fixed once the site is built, so
+        # store them as a frozenset for has_feature membership tests.
+        self.features = frozenset(f.feature for f in self.set_features)
 
         if tile is None:
             self.tile = aparts[0]
@@ -1156,6 +1204,28 @@ class Site(object):
                                  'site_source')] + site_pips +
                                [('bel_pin', bel_name, bel_pin, 'input')])
 
+    def add_sinks(self, bel, sinks):
+        """ Adds multiple sinks without site pips to the specified bel.
+
+        bel (Bel): Bel object
+        sinks (iterable): Tuples of (cell_pin, sink_site_pin, bel_name,
+            bel_pin, real_cell_pin), with the same meaning as the arguments
+            of Site.add_sink.  real_cell_pin may be None.
+
+        Sinks are added in iteration order.  This is intended for large
+        precomputed tables of sinks, e.g. LUT address pins.
+
+        """
+        add_sink = self.add_sink
+        for cell_pin, sink_site_pin, bel_name, bel_pin, real_cell_pin in sinks:
+            add_sink(
+                bel,
+                cell_pin,
+                sink_site_pin,
+                bel_name,
+                bel_pin,
+                real_cell_pin=real_cell_pin)
+
     def mask_sink(self, bel, bel_pin):
         """ Mark a BEL pin as not visible in the Verilog.
 
@@ -2383,6 +2453,10 @@ set net [get_nets -of_object $pin]""".format(
 
         return self.wire_assigns.find_sinks_from_source(source_wire)
 
+    def has_sink_from_source(self, site, site_wire):
+        """ Returns True if a site wire source has at least one sink. """
+        return bool(self.find_sinks_from_source(site, site_wire))
+
     def find_sources_from_sink(self, site, site_wire):
         """ Return all source wire names from a site wire sink. """
         wire_pkey = site.site_wire_to_wire_pkey[site_wire]
@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+# Copyright 2021-2022 F4PGA Authors
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# SPDX-License-Identifier: Apache-2.0
+
+import unittest
+import fasm2bels.models.clb_models
+from fasm2bels.models.clb_models import make_hex_verilog_value, munge_ram32m_init
+import doctest
+
+
+def munge_ram32m_init_bits(init):
+    """ Reference RAM32M INIT interleave, working on a string of bits. """
+    bits = '{:064b}'.format(init)[::-1]
+
+    out_init = ['0' for _ in range(64)]
+    out_init[::2] = bits[:32]
+    out_init[1::2] = bits[32:]
+
+    return make_hex_verilog_value(64, int(''.join(out_init[::-1]), 2))
+
+
+class TestClbModels(unittest.TestCase):
+    def test_munge_ram32m_init(self):
+        for init in [
+                0,
+                1,
+                1 << 31,
+                1 << 32,
+                1 << 63,
+                0xFFFFFFFF,
+                0xFFFFFFFF00000000,
+                0xFFFFFFFFFFFFFFFF,
+                0x5555555555555555,
+                0xAAAAAAAAAAAAAAAA,
+                0x0123456789ABCDEF,
+                0xDEADBEEFCAFEF00D,
+        ]:
+            self.assertEqual(
+                munge_ram32m_init(init), munge_ram32m_init_bits(init),
+                hex(init))
+
+    def test_doctest(self):
+        doctest.testmod(fasm2bels.models.clb_models)
@@ -19,7 +19,7 @@
 
 import unittest
 import fasm2bels.models.verilog_modeling
-from fasm2bels.models.verilog_modeling import Wire, Constant, Bus, NoConnect
+from fasm2bels.models.verilog_modeling import Wire, Constant, Bus, NoConnect, Bel, Site
 import doctest
 
 
@@ -51,5 +51,40 @@ class TestVerilogModeling(unittest.TestCase):
         self.assertEqual(list(Constant(0).iter_wires()), [])
         self.assertEqual(list(NoConnect().iter_wires()), [])
 
+    def test_add_sinks(self):
+        sinks = [
+            ('A[0]', 'A1', 'A6LUT', 'A1', None),
+            ('A[1]', 'A2', 'A6LUT', 'A2', 'RADR1'),
+            ('WA[0]', 'A1', 'A6LUT', 'WA1', None),
+        ]
+
+        site = Site([], None, tile='TILE')
+        bel = Bel('RAMD64E', 'A6LUT')
+        for cell_pin, sink_site_pin, bel_name, bel_pin, real_cell_pin in sinks:
+            site.add_sink(
+                bel,
+                cell_pin,
+                sink_site_pin,
+                bel_name,
+                bel_pin,
+                real_cell_pin=real_cell_pin)
+
+        batch_site = Site([], None, tile='TILE')
+        batch_bel = Bel('RAMD64E', 'A6LUT')
+        batch_site.add_sinks(batch_bel, sinks)
+
+        self.assertEqual(batch_bel.connections, bel.connections)
+        self.assertEqual(batch_bel.bel_pins_to_cell_pins,
+                         bel.bel_pins_to_cell_pins)
+        self.assertEqual(batch_site.site_type_pins, site.site_type_pins)
+        self.assertEqual(batch_site.site_routing, site.site_routing)
+
+        self.assertEqual(batch_site.sinks.keys(), site.sinks.keys())
+        for sink_site_pin, site_sinks in site.sinks.items():
+            batch_sinks = batch_site.sinks[sink_site_pin]
+            self.assertEqual([cell_pin for _, cell_pin in batch_sinks],
+                             [cell_pin for _, cell_pin in site_sinks])
+            self.assertTrue(all(b is batch_bel for b, _ in batch_sinks))
+
     def test_doctest(self):
         doctest.testmod(fasm2bels.models.verilog_modeling)